@@ -1,12 +1,53 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g, has_request_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import sqlite3
 import os
+import re
+import click
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
-from urllib.parse import urlparse
+import lxml.html
+from lxml import etree
+from htmldate import find_date
+from urllib.parse import urlparse, urljoin
 import openai
+import json
+import base64
+import hashlib
+import hmac
+import time
+import random
+import uuid
+import codecs
+import csv
+import io
+from html.parser import HTMLParser
+import threading
+import queue
+import heapq
+import contextvars
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from collections import OrderedDict, namedtuple, deque
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from dotenv import load_dotenv
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+try:
+    import trafilatura
+except ImportError:
+    trafilatura = None
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 from datetime import datetime, timedelta
 
 # Load environment variables
@@ -26,6 +67,143 @@ else:
     app.config['DEBUG'] = True
     app.config['TESTING'] = True
 
+# Metrics in Prometheus text format, served at /metrics. They are kept per
+# process, so with several gunicorn workers each scrape sees one worker.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.help = {}
+
+    def describe(self, name, kind, text):
+        self.help[name] = (kind, text)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {'buckets': [0] * len(LATENCY_BUCKETS), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    histogram['buckets'][i] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def counter_values(self, name):
+        with self.lock:
+            return {labels: value for (metric, labels), value in self.counters.items() if metric == name}
+
+    def render(self):
+        def format_labels(labels):
+            if not labels:
+                return ''
+            escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for _, value in labels)
+            return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: {**value, 'buckets': list(value['buckets'])} for key, value in self.histograms.items()}
+        lines = []
+        described = set()
+        for (name, labels), value in sorted(counters.items()):
+            if name not in described and name in self.help:
+                lines += [f"# HELP {name} {self.help[name][1]}", f"# TYPE {name} {self.help[name][0]}"]
+                described.add(name)
+            lines.append(f"{name}{format_labels(labels)} {value}")
+        for (name, labels), histogram in sorted(histograms.items()):
+            if name not in described and name in self.help:
+                lines += [f"# HELP {name} {self.help[name][1]}", f"# TYPE {name} histogram"]
+                described.add(name)
+            for bound, count in zip(LATENCY_BUCKETS, histogram['buckets']):
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', bound),))} {count}")
+            lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {histogram['count']}")
+            lines.append(f"{name}_sum{format_labels(labels)} {histogram['sum']}")
+            lines.append(f"{name}_count{format_labels(labels)} {histogram['count']}")
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+metrics.describe('mundus_request_duration_seconds', 'histogram', 'Request latency by endpoint.')
+metrics.describe('mundus_stage_duration_seconds', 'histogram', 'Time spent per request stage (db, fetch, parse, prompt, llm, serialize).')
+metrics.describe('mundus_cache_requests_total', 'counter', 'Cache lookups by cache and result.')
+metrics.describe('mundus_outbound_fetches_total', 'counter', 'Publisher fetches by kind and result.')
+metrics.describe('mundus_openai_requests_total', 'counter', 'OpenAI completion requests by endpoint and result.')
+metrics.describe('mundus_openai_tokens_total', 'counter', 'OpenAI token usage by endpoint and token type.')
+metrics.describe('mundus_single_flight_total', 'counter', 'Coalesced calls by flight and role (leader ran the work, follower shared it).')
+
+def current_endpoint():
+    return (request.endpoint or 'unknown') if has_request_context() else 'background'
+
+def count_cache_lookup(cache, hit):
+    metrics.inc('mundus_cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+class StageTimer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = OrderedDict()
+
+    def add(self, stage, seconds):
+        with self.lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+@contextmanager
+def timed(stage):
+    """Add the time spent in the block to the current request's `stage`.
+
+    Outside a request (warmer, CLI) nothing is recorded. Stages that run in
+    parallel threads add up, so `fetch` can exceed the wall-clock time.
+    """
+    timer = g.get('stage_timer') if has_request_context() else None
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timer is not None:
+            timer.add(stage, time.perf_counter() - start)
+
+class TimedJSONProvider(DefaultJSONProvider):
+    # jsonify() goes through here, so every JSON response reports `serialize`
+    def response(self, *args, **kwargs):
+        with timed('serialize'):
+            return super().response(*args, **kwargs)
+
+app.json = TimedJSONProvider(app)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.stage_timer = StageTimer()
+
+@app.after_request
+def add_server_timing(response):
+    started = g.get('request_started')
+    timer = g.get('stage_timer')
+    if started is None or timer is None:
+        return response
+    total = time.perf_counter() - started
+    endpoint = current_endpoint()
+    entries = []
+    for stage, seconds in timer.stages.items():
+        entries.append(f"{stage};dur={seconds * 1000:.1f}")
+        metrics.observe('mundus_stage_duration_seconds', seconds, endpoint=endpoint, stage=stage)
+    entries.append(f"total;dur={total * 1000:.1f}")
+    metrics.observe(
+        'mundus_request_duration_seconds', total,
+        endpoint=endpoint, method=request.method, status=str(response.status_code)
+    )
+    response.headers['Server-Timing'] = ', '.join(entries)
+    # Without this, browsers hide Server-Timing from the cross-origin frontend
+    response.headers['Timing-Allow-Origin'] = '*'
+    return response
+
 DATABASES = {
     'swe': 'swedish_news_URLs.db',
     'pol': 'polish_news_URLs.db', 
@@ -33,15 +211,2226 @@ DATABASES = {
     'den': 'danish_news_URLs.db'
 }
 
-def get_db_connection(country_code):
-    db_path = DATABASES.get(country_code.lower())
-    if not db_path:
-        raise ValueError("Unsupported country code")
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    conn.text_factory = str
+def get_db_connection(country_code):
+    db_path = DATABASES.get(country_code.lower())
+    if not db_path:
+        raise ValueError("Unsupported country code")
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.text_factory = str
+    return conn
+
+# Request handlers read through per-process pools of long-lived read-only
+# connections, so the page cache, parsed schema and prepared statements survive
+# between requests. get_db_connection() stays for writers such as migrate-db.
+SQLITE_POOL_SIZE = int(os.getenv('SQLITE_POOL_SIZE', os.getenv('GUNICORN_THREADS', 16)))
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', -32000))  # negative means KiB
+SQLITE_STATEMENT_CACHE = int(os.getenv('SQLITE_STATEMENT_CACHE', 256))
+
+class ConnectionPool:
+    def __init__(self, db_path, size):
+        self.db_path = db_path
+        self.connections = queue.LifoQueue(maxsize=size)
+
+    def connect(self):
+        uri = Path(self.db_path).absolute().as_uri() + '?mode=ro'
+        # check_same_thread is off because gunicorn threads take turns using a
+        # connection; the pool never hands one connection to two threads at once.
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            check_same_thread=False,
+            cached_statements=SQLITE_STATEMENT_CACHE
+        )
+        conn.row_factory = sqlite3.Row
+        conn.text_factory = str
+        conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size = {SQLITE_CACHE_SIZE}")
+        return conn
+
+    def acquire(self):
+        try:
+            return self.connections.get_nowait()
+        except queue.Empty:
+            return self.connect()
+
+    def release(self, conn):
+        try:
+            self.connections.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+db_pools = {}
+db_pools_pid = None
+db_pools_lock = threading.Lock()
+
+def get_db_pool(country_code):
+    global db_pools, db_pools_pid
+    db_path = DATABASES.get(country_code.lower())
+    if not db_path:
+        raise ValueError("Unsupported country code")
+    with db_pools_lock:
+        # Connections must not cross a fork, so each gunicorn worker starts afresh
+        if db_pools_pid != os.getpid():
+            db_pools = {}
+            db_pools_pid = os.getpid()
+        pool = db_pools.get(db_path)
+        if pool is None:
+            pool = db_pools[db_path] = ConnectionPool(db_path, SQLITE_POOL_SIZE)
+        return pool
+
+@contextmanager
+def db_connection(country_code):
+    pool = get_db_pool(country_code)
+    conn = pool.acquire()
+    try:
+        with timed('db'):
+            yield conn
+    except sqlite3.DatabaseError:
+        # Don't hand a connection in an unknown state to the next request
+        conn.close()
+        raise
+    except BaseException:
+        # Handler errors, or a client leaving an export mid-stream, leave the
+        # connection itself fine
+        pool.release(conn)
+        raise
+    else:
+        pool.release(conn)
+
+# Letters that unicode61's remove_diacritics leaves alone because they have no
+# Unicode decomposition. They are folded with plain replace() calls so that the
+# triggers keep working from the scrapers' connections too.
+SEARCH_FOLDED_LETTERS = {
+    'ł': 'l', 'Ł': 'L',
+    'ø': 'o', 'Ø': 'O',
+    'æ': 'ae', 'Æ': 'AE',
+    'đ': 'd', 'Đ': 'D',
+    'ß': 'ss',
+}
+
+def fold_sql(expression):
+    for letter, replacement in SEARCH_FOLDED_LETTERS.items():
+        expression = f"replace({expression}, '{letter}', '{replacement}')"
+    return expression
+
+def fold_text(text):
+    for letter, replacement in SEARCH_FOLDED_LETTERS.items():
+        text = text.replace(letter, replacement)
+    return text
+
+# Full-text index over article titles, kept in sync with `articles` by triggers
+# so the scrapers keep writing to `articles` as before. `remove_diacritics 2`
+# folds the remaining accents, so "lodz" matches "Łódź" and "malmo" "Malmö".
+SEARCH_INDEX_SCHEMA = [
+    """
+        CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+            title,
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """,
+    f"""
+        CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+            INSERT INTO articles_fts(rowid, title) VALUES (new.id, {fold_sql('new.title')});
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+            DELETE FROM articles_fts WHERE rowid = old.id;
+        END
+    """,
+    f"""
+        CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE ON articles BEGIN
+            DELETE FROM articles_fts WHERE rowid = old.id;
+            INSERT INTO articles_fts(rowid, title) VALUES (new.id, {fold_sql('new.title')});
+        END
+    """,
+]
+
+# Indexes backing the article list. (published, id) is the keyset used by
+# cursor pagination, so every page is a short range scan whatever its depth.
+# The source and category indexes end in (published, id) as well, so a filtered
+# list is read in order straight off the index without a temp B-tree sort.
+ARTICLE_INDEX_SCHEMA = [
+    "CREATE INDEX IF NOT EXISTS idx_articles_published_id ON articles(published, id)",
+    "CREATE INDEX IF NOT EXISTS idx_articles_source_published ON articles(source, published, id)",
+    "CREATE INDEX IF NOT EXISTS idx_articles_category_published ON articles(AI_tag, published, id)",
+    # Lets the content warmer find newly scraped rows without a scan
+    "CREATE INDEX IF NOT EXISTS idx_articles_scraped_id ON articles(scraped_at, id)",
+]
+
+def has_table(conn, name):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+def build_fts_query(search_query):
+    # Quote every word so user input can't inject FTS syntax, and prefix-match
+    # the words so partial input like "stockh" still finds "Stockholm".
+    terms = re.findall(r'\w+', fold_text(search_query))
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def migrate_database(country_code, rebuild=False):
+    conn = get_db_connection(country_code)
+    try:
+        created = not has_table(conn, 'articles_fts')
+        # WAL lets the pooled readers keep serving while the scrapers write
+        conn.execute("PRAGMA journal_mode = WAL")
+        for statement in SEARCH_INDEX_SCHEMA + ARTICLE_INDEX_SCHEMA:
+            conn.execute(statement)
+        if created or rebuild:
+            # Backfill the index from the rows the scrapers already stored
+            conn.execute("DELETE FROM articles_fts")
+            conn.execute(f"INSERT INTO articles_fts(rowid, title) SELECT id, {fold_sql('title')} FROM articles")
+        conn.commit()
+        # Gather statistics for any new index so the planner picks it
+        conn.execute("PRAGMA optimize")
+        return created or rebuild
+    finally:
+        conn.close()
+
+ArticleFilter = namedtuple('ArticleFilter', ['join', 'where', 'params', 'order_by', 'cache_key'])
+
+def build_article_filter(conn, search_query='', source='', category='', time_filter='', sort='recent'):
+    """Build the FROM/WHERE parts shared by every article list query.
+
+    Only the filters that are actually set become predicates. The old
+    `(? = '' OR source = ?)` form hid every column behind an OR, which kept
+    SQLite from using the source and category indexes.
+    """
+    join = ""
+    conditions = []
+    params = []
+    order_by = "articles.published DESC, articles.id DESC"
+
+    if search_query:
+        fts_query = build_fts_query(search_query)
+        if fts_query and has_table(conn, 'articles_fts'):
+            join = "JOIN articles_fts ON articles_fts.rowid = articles.id"
+            conditions.append("articles_fts MATCH ?")
+            params.append(fts_query)
+            if sort == 'relevance':
+                order_by = "bm25(articles_fts), articles.published DESC, articles.id DESC"
+        else:
+            # Databases that haven't been migrated yet fall back to a scan
+            conditions.append("LOWER(articles.title) LIKE LOWER(?)")
+            params.append(f"%{search_query}%")
+    if source:
+        conditions.append("articles.source = ?")
+        params.append(source)
+    if category:
+        conditions.append("articles.AI_tag = ?")
+        params.append(category)
+    if time_filter:
+        hours = int(time_filter)
+        # Whole minutes, so repeated requests share one cached total
+        now = datetime.now().replace(second=0, microsecond=0)
+        conditions.append("articles.published >= ?")
+        params.append((now - timedelta(hours=hours)).isoformat())
+
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+    return ArticleFilter(join, where, params, order_by, (join, where) + tuple(params))
+
+def add_condition(where, condition):
+    return f"{where} AND {condition}" if where else f"WHERE {condition}"
+
+def cursor_conditions(cursor_published, cursor_id):
+    """Keyset predicates, in page order, for the rows after a (published, id) cursor.
+
+    `published` is nullable. Undated rows sort after every dated one, but
+    `published < ?` never matches NULL, so a cursor on a dated row goes on
+    with the older dated rows and then the undated ones, and a cursor on an
+    undated row with the undated rows below its id. Each part is a range
+    scan of the (published, id) index.
+    """
+    if cursor_published is None:
+        return [("(articles.published IS NULL AND articles.id < ?)", [cursor_id])]
+    return [
+        (
+            "(articles.published < ? OR (articles.published = ? AND articles.id < ?))",
+            [cursor_published, cursor_published, cursor_id]
+        ),
+        ("articles.published IS NULL", []),
+    ]
+
+def fetch_keyset_rows(conn, select, where, params, order_by, conditions, limit):
+    """Up to `limit` rows, taking each (condition, params) part in turn until the page is full."""
+    rows = []
+    for condition, condition_params in conditions:
+        rows += conn.execute(
+            f"{select} {add_condition(where, condition) if condition else where} ORDER BY {order_by} LIMIT ?",
+            params + condition_params + [limit - len(rows)]
+        ).fetchall()
+        if len(rows) >= limit:
+            break
+    return rows
+
+def encode_cursor(row):
+    payload = json.dumps([row['published'], row['id']]).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+def decode_cursor(cursor):
+    try:
+        published, article_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return published, int(article_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def encode_federated_cursor(row):
+    payload = json.dumps([row['published'], row['country'], row['id']]).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+def decode_federated_cursor(cursor):
+    try:
+        published, country_code, article_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return published, str(country_code), int(article_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def db_change_token(country_code):
+    # PRAGMA data_version only reports changes seen by one connection, so caches
+    # shared across requests key on the database (and WAL) file stats instead.
+    db_path = DATABASES.get(country_code.lower())
+    if not db_path:
+        raise ValueError("Unsupported country code")
+    token = []
+    for path in (db_path, db_path + '-wal'):
+        try:
+            stat = os.stat(path)
+            token.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            token.append(None)
+    return tuple(token)
+
+# Article list totals keyed by (country, normalised filters). Entries are only
+# served for `count=exact` while the database is unchanged.
+COUNT_CACHE_SIZE = int(os.getenv('COUNT_CACHE_SIZE', 1024))
+COUNT_ESTIMATE_CAP = int(os.getenv('COUNT_ESTIMATE_CAP', 10000))
+count_cache = OrderedDict()
+count_cache_lock = threading.Lock()
+
+def count_articles(conn, country_code, cache_key, from_where, params, mode='exact'):
+    """Return (total, is_estimate) for the article list, or (None, False) for count=none."""
+    if mode == 'none':
+        return None, False
+
+    key = (country_code.lower(),) + cache_key
+    token = db_change_token(country_code)
+    with count_cache_lock:
+        cached = count_cache.get(key)
+        if cached:
+            count_cache.move_to_end(key)
+    count_cache_lookup('count', bool(cached and cached[0] == token))
+    if cached and cached[0] == token:
+        return cached[1], False
+    if cached and mode == 'estimate':
+        return cached[1], True
+
+    if mode == 'estimate':
+        # Stop counting at the cap; callers only need "roughly how many pages"
+        total = conn.execute(
+            f"SELECT COUNT(*) as total FROM (SELECT 1 {from_where} LIMIT ?)",
+            list(params) + [COUNT_ESTIMATE_CAP + 1]
+        ).fetchone()['total']
+        if total <= COUNT_ESTIMATE_CAP:
+            store_count(key, token, total)
+            return total, False
+        return COUNT_ESTIMATE_CAP, True
+
+    total = conn.execute(f"SELECT COUNT(*) as total {from_where}", params).fetchone()['total']
+    store_count(key, token, total)
+    return total, False
+
+def store_count(key, token, total):
+    with count_cache_lock:
+        count_cache[key] = (token, total)
+        count_cache.move_to_end(key)
+        while len(count_cache) > COUNT_CACHE_SIZE:
+            count_cache.popitem(last=False)
+
+# Distinct sources/categories per country. They only change when the scrapers
+# write, so they are recomputed when the database file changes and otherwise
+# served from memory, with an ETag so browsers can revalidate for a 304.
+FACET_CACHE_MAX_AGE = int(os.getenv('FACET_CACHE_MAX_AGE', 60))
+facet_cache = {}
+facet_cache_lock = threading.Lock()
+
+def get_facet(country_code, name, query):
+    key = (country_code.lower(), name)
+    token = db_change_token(country_code)
+    with facet_cache_lock:
+        cached = facet_cache.get(key)
+    count_cache_lookup('facet', bool(cached and cached[0] == token))
+    if cached and cached[0] == token:
+        return cached[1], cached[2]
+
+    with db_connection(country_code) as conn:
+        values = [row[0] for row in conn.execute(query)]
+    etag = hashlib.sha1(json.dumps(values).encode('utf-8')).hexdigest()
+    with facet_cache_lock:
+        facet_cache[key] = (token, values, etag)
+    return values, etag
+
+def facet_response(values, etag):
+    response = jsonify(values)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={FACET_CACHE_MAX_AGE}'
+    return response.make_conditional(request)
+
+# Local cache database for data we derive from publishers and OpenAI. It is
+# separate from the country databases, which the request path opens read-only.
+# Everything in it can be refetched, so a schema change simply drops the old
+# tables: bump CACHE_SCHEMA_VERSION whenever CACHE_SCHEMA changes.
+CACHE_DB_PATH = os.getenv('CACHE_DB_PATH', 'mundus_cache.db')
+CACHE_SCHEMA_VERSION = 4
+# accessed_at only orders the LRU eviction, so a hit refreshes it at most this
+# often instead of turning every read into a write
+CACHE_TOUCH_INTERVAL = int(os.getenv('CACHE_TOUCH_INTERVAL', 60))
+CACHE_SCHEMA = [
+    """
+        CREATE TABLE IF NOT EXISTS fetched_content (
+            url TEXT PRIMARY KEY,
+            text TEXT,
+            description TEXT,
+            first_paragraph TEXT,
+            image TEXT,
+            favicon TEXT,
+            published_date TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            fetched_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_fetched_content_accessed ON fetched_content(accessed_at)",
+    """
+        CREATE TABLE IF NOT EXISTS summary_cache (
+            key TEXT PRIMARY KEY,
+            summary TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_summary_cache_accessed ON summary_cache(accessed_at)",
+    """
+        CREATE TABLE IF NOT EXISTS warmer_state (
+            country TEXT PRIMARY KEY,
+            scraped_at TEXT NOT NULL,
+            article_id INTEGER NOT NULL
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS site_metadata (
+            origin TEXT PRIMARY KEY,
+            favicon TEXT,
+            resolved_at REAL NOT NULL
+        )
+    """,
+]
+cache_local = threading.local()
+
+def get_cache_connection():
+    # One connection per thread; WAL and a busy timeout let threads and
+    # gunicorn workers write to the cache concurrently.
+    conn = getattr(cache_local, 'conn', None)
+    if conn is None or cache_local.pid != os.getpid():
+        conn = sqlite3.connect(CACHE_DB_PATH, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        with conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != CACHE_SCHEMA_VERSION:
+                tables = conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+                ).fetchall()
+                for table in tables:
+                    conn.execute(f"DROP TABLE IF EXISTS {table['name']}")
+                conn.execute(f"PRAGMA user_version = {CACHE_SCHEMA_VERSION}")
+            for statement in CACHE_SCHEMA:
+                conn.execute(statement)
+        cache_local.conn = conn
+        cache_local.pid = os.getpid()
+    return conn
+
+# Single-flight coalescing. When several requests need the same page or the
+# same summary at once, the first runs the work and the rest wait for its
+# result. With SINGLE_FLIGHT_CROSS_WORKER=1 the leader also holds a file lock,
+# so a leader in another gunicorn worker waits too and then finds the result
+# in the cache. Keys hash onto a fixed set of lock files; a collision only
+# makes two unrelated calls take turns.
+SINGLE_FLIGHT_CROSS_WORKER = os.getenv('SINGLE_FLIGHT_CROSS_WORKER', '0') == '1' and fcntl is not None
+SINGLE_FLIGHT_LOCK_DIR = os.getenv('SINGLE_FLIGHT_LOCK_DIR', os.path.join(tempfile.gettempdir(), 'mundus-single-flight'))
+SINGLE_FLIGHT_LOCK_FILES = 1024
+SINGLE_FLIGHT_LOCK_WAIT = float(os.getenv('SINGLE_FLIGHT_LOCK_WAIT', 60))
+
+@contextmanager
+def cross_worker_lock(name, key):
+    if not SINGLE_FLIGHT_CROSS_WORKER:
+        yield
+        return
+    os.makedirs(SINGLE_FLIGHT_LOCK_DIR, exist_ok=True)
+    slot = int(hashlib.sha1(f"{name}:{key}".encode('utf-8')).hexdigest(), 16) % SINGLE_FLIGHT_LOCK_FILES
+    with open(os.path.join(SINGLE_FLIGHT_LOCK_DIR, f"{name}-{slot}.lock"), 'a') as lock_file:
+        # Poll rather than block, so a stuck worker can't hold everyone up
+        # beyond SINGLE_FLIGHT_LOCK_WAIT; after that the work just runs.
+        expires_at = time.monotonic() + SINGLE_FLIGHT_LOCK_WAIT
+        locked = False
+        while not locked:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                locked = True
+            except BlockingIOError:
+                if time.monotonic() >= expires_at:
+                    break
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if locked:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, function):
+        """Return function(), sharing one call among concurrent callers with the same key.
+
+        Followers get the leader's result or exception.
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = Future()
+        metrics.inc('mundus_single_flight_total', flight=self.name, role='leader' if leader else 'follower')
+        if not leader:
+            return call.result()
+
+        try:
+            with cross_worker_lock(self.name, key):
+                result = function()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+page_flight = SingleFlight('page')
+preview_flight = SingleFlight('preview')
+summary_flight = SingleFlight('summary')
+
+FETCH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Charset': 'utf-8'
+}
+
+# One outbound session per worker process, so connections and TLS sessions to
+# the publishers we hit all day are reused. Idempotent GETs are retried with
+# backoff on connection errors and 5xx responses. Read timeouts are not: each
+# retry would get the whole timeout again, and begin_fetch() has already sized
+# it for the domain.
+HTTP_POOL_HOSTS = int(os.getenv('HTTP_POOL_HOSTS', 64))
+HTTP_POOL_PER_HOST = int(os.getenv('HTTP_POOL_PER_HOST', 4))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 2))
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', 0.3))
+http_session = None
+http_session_pid = None
+http_session_lock = threading.Lock()
+
+def get_http_session():
+    global http_session, http_session_pid
+    with http_session_lock:
+        if http_session_pid != os.getpid():
+            retry = Retry(
+                total=HTTP_RETRIES,
+                # Raise read timeouts as they are, rather than as MaxRetryError
+                read=False,
+                backoff_factor=HTTP_RETRY_BACKOFF,
+                status_forcelist=(500, 502, 503, 504),
+                allowed_methods=frozenset(['GET', 'HEAD']),
+                respect_retry_after_header=False,
+                raise_on_status=False
+            )
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_HOSTS,
+                pool_maxsize=HTTP_POOL_PER_HOST,
+                max_retries=retry
+            )
+            session = requests.Session()
+            session.headers.update(FETCH_HEADERS)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            http_session = session
+            http_session_pid = os.getpid()
+        return http_session
+
+# Per-domain fetch health. Each publisher gets a timeout that tracks its own
+# recent latency (FETCH_TIMEOUT_PERCENTILE x FETCH_TIMEOUT_MULTIPLIER, kept
+# between FETCH_TIMEOUT_MIN and the caller's timeout), and a circuit breaker:
+# after BREAKER_FAILURE_THRESHOLD failures in a row the domain is skipped for
+# BREAKER_OPEN_SECONDS, then a single probe decides whether it closes again.
+# State is per worker process.
+FETCH_LATENCY_WINDOW = int(os.getenv('FETCH_LATENCY_WINDOW', 50))
+FETCH_LATENCY_MIN_SAMPLES = 5
+FETCH_TIMEOUT_PERCENTILE = float(os.getenv('FETCH_TIMEOUT_PERCENTILE', 0.95))
+FETCH_TIMEOUT_MULTIPLIER = float(os.getenv('FETCH_TIMEOUT_MULTIPLIER', 3))
+FETCH_TIMEOUT_MIN = float(os.getenv('FETCH_TIMEOUT_MIN', 1))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', 5))
+BREAKER_OPEN_SECONDS = float(os.getenv('BREAKER_OPEN_SECONDS', 60))
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of fetching from a domain whose breaker is open."""
+
+class DomainHealth:
+    def __init__(self):
+        self.latencies = deque(maxlen=FETCH_LATENCY_WINDOW)
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.state = 'closed'
+        self.opened_at = None
+        self.probing = False
+        self.last_error = None
+
+    def percentile(self, fraction):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def timeout(self, ceiling):
+        if len(self.latencies) < FETCH_LATENCY_MIN_SAMPLES:
+            return ceiling
+        return min(ceiling, max(FETCH_TIMEOUT_MIN, self.percentile(FETCH_TIMEOUT_PERCENTILE) * FETCH_TIMEOUT_MULTIPLIER))
+
+domain_health = {}
+domain_health_lock = threading.Lock()
+
+def get_domain_health(url):
+    domain = urlparse(url).netloc
+    with domain_health_lock:
+        health = domain_health.get(domain)
+        if health is None:
+            health = domain_health[domain] = DomainHealth()
+        return health
+
+def begin_fetch(url, timeout):
+    """Return the timeout to fetch `url` with, or raise CircuitOpenError."""
+    health = get_domain_health(url)
+    with domain_health_lock:
+        if health.state == 'open':
+            if time.time() - health.opened_at < BREAKER_OPEN_SECONDS:
+                metrics.inc('mundus_outbound_fetches_total', kind='breaker', result='rejected')
+                raise CircuitOpenError(f"Circuit open for {urlparse(url).netloc}")
+            health.state = 'half_open'
+        if health.state == 'half_open':
+            # One request probes the domain; the rest are still turned away
+            if health.probing:
+                metrics.inc('mundus_outbound_fetches_total', kind='breaker', result='rejected')
+                raise CircuitOpenError(f"Circuit half-open for {urlparse(url).netloc}")
+            health.probing = True
+        return health.timeout(timeout)
+
+def end_fetch(url, seconds=None, error=None):
+    """Record how a fetch of `url` went: its latency, or the error it failed with.
+
+    Every begin_fetch() that returned must be followed by one end_fetch().
+    """
+    health = get_domain_health(url)
+    with domain_health_lock:
+        health.probing = False
+        if error is None:
+            health.latencies.append(seconds)
+            health.successes += 1
+            health.consecutive_failures = 0
+            health.state = 'closed'
+            return
+        health.failures += 1
+        health.consecutive_failures += 1
+        health.last_error = error
+        if health.state == 'half_open' or health.consecutive_failures >= BREAKER_FAILURE_THRESHOLD:
+            if health.state != 'open':
+                print(f"Opening fetch circuit for {urlparse(url).netloc}: {error}")
+            health.state = 'open'
+            health.opened_at = time.time()
+
+def server_error(response):
+    # 4xx is the page's problem, not the site's, so only 5xx counts against it
+    return f"HTTP {response.status_code}" if response.status_code >= 500 else None
+
+# Fetched article pages, shared by the preview and both summarize endpoints so
+# an article is downloaded and parsed once however many times it is used.
+# After CONTENT_STORE_TTL a page is revalidated with a conditional GET, and a
+# 304 from the publisher keeps the stored copy. Pages are dropped for good after
+# CONTENT_STORE_MAX_AGE or when they fall off the end of the LRU.
+CONTENT_STORE_TTL = int(os.getenv('CONTENT_STORE_TTL', 6 * 60 * 60))
+CONTENT_STORE_MAX_AGE = int(os.getenv('CONTENT_STORE_MAX_AGE', 7 * 24 * 60 * 60))
+CONTENT_STORE_MAX_ENTRIES = int(os.getenv('CONTENT_STORE_MAX_ENTRIES', 5000))
+CONTENT_FIELDS = ('text', 'description', 'first_paragraph', 'image', 'favicon', 'published_date')
+
+def resolve_favicon(href, page_url):
+    # Relative hrefs resolve against the page; sites without a <link rel=icon>
+    # serve theirs from the conventional path
+    return urljoin(page_url, href.strip() if href else '/favicon.ico')
+
+# A site's favicon doesn't depend on the article, so it is resolved from the
+# first page fetched from each site (scheme + host) and reused for every other
+# article there, here and in the site_metadata table, for SITE_METADATA_TTL.
+SITE_METADATA_TTL = int(os.getenv('SITE_METADATA_TTL', 7 * 24 * 60 * 60))
+site_metadata = {}
+site_metadata_lock = threading.Lock()
+
+def site_origin(url):
+    parsed_url = urlparse(url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+def get_site_favicon(url):
+    """The cached favicon of the site `url` belongs to, or None if it isn't known yet."""
+    origin = site_origin(url)
+    with site_metadata_lock:
+        entry = site_metadata.get(origin)
+    if entry is None:
+        row = get_cache_connection().execute(
+            "SELECT favicon, resolved_at FROM site_metadata WHERE origin = ?", (origin,)
+        ).fetchone()
+        if row is None:
+            count_cache_lookup('site', False)
+            return None
+        entry = (row['favicon'], row['resolved_at'])
+        with site_metadata_lock:
+            site_metadata[origin] = entry
+    if entry[1] < time.time() - SITE_METADATA_TTL:
+        count_cache_lookup('site', False)
+        return None
+    count_cache_lookup('site', True)
+    return entry[0]
+
+def store_site_favicon(url, favicon):
+    origin = site_origin(url)
+    now = time.time()
+    conn = get_cache_connection()
+    conn.execute(
+        "INSERT OR REPLACE INTO site_metadata (origin, favicon, resolved_at) VALUES (?, ?, ?)",
+        (origin, favicon, now)
+    )
+    conn.commit()
+    with site_metadata_lock:
+        site_metadata[origin] = (favicon, now)
+
+# Main-content extraction. EXTRACTION_ENGINE picks how article text is pulled
+# out of a page:
+#   lxml        - lxml parse, boilerplate containers skipped, paragraphs of the
+#                 main container kept unless they are mostly links (default)
+#   trafilatura - trafilatura's extractor, if it is installed
+#   legacy      - every <p> of an html.parser parse, as before
+# Description, image, favicon and publication date come from the lxml tree
+# whichever engine is used.
+BOILERPLATE_TAGS = ('script', 'style', 'noscript', 'template', 'svg', 'iframe', 'form', 'nav', 'header', 'footer', 'aside', 'button')
+# Matched against whole class/id/role tokens, so "share-buttons" and
+# "site-footer" are boilerplate but "js-share-tracking" and
+# "main-content-with-sidebar" are not.
+BOILERPLATE_TOKEN = re.compile(
+    r'(?:(?:site|page|global|main|article|post)[-_])?'
+    r'(?:cookies?|consent|gdpr|banner|footer|header|nav|navigation|menu|breadcrumbs?|share|sharing|social|'
+    r'related|recommended|newsletter|subscribe|signup|comments?|advert|ads?|promo|sponsored|popup|modal|'
+    r'sidebar|widget|paywall)'
+    r'(?:[-_](?:bar|banner|box|buttons?|links?|list|wrapper|container|area|section|notice|tools|icons?|block))?',
+    re.IGNORECASE
+)
+MAIN_CONTENT_XPATHS = (
+    '//*[@itemprop="articleBody"]',
+    '//article',
+    '//main',
+    '//*[@role="main"]',
+)
+PARAGRAPH_MAX_LINK_DENSITY = 0.5
+# An element holding more than this share of the container's text is the
+# story itself, whatever its class says
+BOILERPLATE_MAX_TEXT_SHARE = 0.5
+
+def parse_html_tree(html):
+    """The lxml document for `html`, or None when there is no document to parse."""
+    try:
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # lxml refuses str input that carries an XML encoding declaration
+            return lxml.html.document_fromstring(html.encode('utf-8'))
+    except etree.ParserError:
+        # Empty or whitespace-only bodies
+        return None
+
+def text_of(element):
+    return ' '.join(element.text_content().split())
+
+def looks_like_boilerplate(element):
+    if element.tag in BOILERPLATE_TAGS:
+        return True
+    tokens = f"{element.get('class', '')} {element.get('id', '')} {element.get('role', '')}".split()
+    return any(BOILERPLATE_TOKEN.fullmatch(token) for token in tokens)
+
+def extract_paragraphs_lxml(html, tree):
+    containers = []
+    for xpath in MAIN_CONTENT_XPATHS:
+        containers = tree.xpath(xpath)
+        if containers:
+            break
+    if not containers:
+        containers = [tree.body if tree.body is not None else tree]
+    # The biggest candidate wins, so a teaser <article> doesn't shadow the story
+    container = max(containers, key=lambda element: len(element.text_content()))
+    container_length = len(container.text_content())
+
+    # Boilerplate is skipped rather than dropped from the tree, so the
+    # fallback below still sees every paragraph
+    verdicts = {container: False}
+
+    def in_boilerplate(element):
+        if element not in verdicts:
+            parent = element.getparent()
+            verdicts[element] = (
+                looks_like_boilerplate(element)
+                and len(element.text_content()) <= container_length * BOILERPLATE_MAX_TEXT_SHARE
+            ) or (parent is not None and in_boilerplate(parent))
+        return verdicts[element]
+
+    paragraphs = []
+    for paragraph in container.iter('p'):
+        text = text_of(paragraph)
+        if not text or in_boilerplate(paragraph):
+            continue
+        link_text = sum(len(text_of(link)) for link in paragraph.iter('a'))
+        if link_text > len(text) * PARAGRAPH_MAX_LINK_DENSITY:
+            continue
+        paragraphs.append(text)
+    if not paragraphs:
+        # Better the whole page than nothing to summarise
+        paragraphs = [text for text in (text_of(paragraph) for paragraph in tree.iter('p')) if text]
+    return paragraphs
+
+def extract_paragraphs_trafilatura(html, tree):
+    text = trafilatura.extract(html, include_comments=False, include_tables=False) or ''
+    return [line for line in text.split('\n') if line.strip()]
+
+def extract_paragraphs_legacy(html, tree):
+    soup = BeautifulSoup(html, 'html.parser')
+    return [p.get_text() for p in soup.find_all('p')]
+
+EXTRACTION_ENGINES = {
+    'lxml': extract_paragraphs_lxml,
+    'trafilatura': extract_paragraphs_trafilatura,
+    'legacy': extract_paragraphs_legacy,
+}
+
+def resolve_extraction_engine(name):
+    if name not in EXTRACTION_ENGINES:
+        raise ValueError(f"Unknown extraction engine: {name}")
+    if name == 'trafilatura' and trafilatura is None:
+        print("trafilatura is not installed, extracting with lxml")
+        return 'lxml'
+    return name
+
+EXTRACTION_ENGINE = resolve_extraction_engine(os.getenv('EXTRACTION_ENGINE', 'lxml'))
+
+def meta_content(tree, attribute, value):
+    values = tree.xpath(f'//meta[@{attribute}=$value]/@content', value=value)
+    return values[0] if values else None
+
+def extract_published_date(tree, url):
+    """Publication date of the page as YYYY-MM-DD, or None when htmldate finds none."""
+    try:
+        return find_date(tree, url=url, original_date=True, extensive_search=False)
+    except Exception as e:
+        print(f"Date extraction failed for {url}: {str(e)}")
+        return None
+
+def parse_article_page(html, url, engine=None, ok=True):
+    """Extract the stored fields from a page; `ok` is False for error responses."""
+    tree = parse_html_tree(html)
+    if tree is None:
+        return {
+            'text': '',
+            'description': None,
+            'first_paragraph': '',
+            'image': None,
+            'favicon': get_site_favicon(url) or resolve_favicon(None, url),
+            'published_date': None
+        }
+
+    description = tree.xpath('//meta[@name="description"]')
+    favicon = get_site_favicon(url)
+    if favicon is None:
+        hrefs = tree.xpath(
+            '//link[contains(concat(" ", translate(@rel, "ICON", "icon"), " "), " icon ")]/@href'
+        )
+        favicon = resolve_favicon(hrefs[0] if hrefs else None, url)
+        # Like the content, the favicon of an error page isn't kept
+        if ok:
+            store_site_favicon(url, favicon)
+    published_date = extract_published_date(tree, url)
+    image = meta_content(tree, 'property', 'og:image')
+
+    paragraphs = EXTRACTION_ENGINES[engine or EXTRACTION_ENGINE](html, tree)
+    return {
+        'text': ''.join(paragraph + '\n' for paragraph in paragraphs),
+        # None means the page has no meta description at all
+        'description': description[0].get('content', '') if description else None,
+        'first_paragraph': paragraphs[0] if paragraphs else '',
+        'image': image,
+        'favicon': favicon,
+        'published_date': published_date
+    }
+
+def get_stored_content(url, allow_stale=False):
+    conn = get_cache_connection()
+    row = conn.execute(
+        f"SELECT {', '.join(CONTENT_FIELDS)}, etag, last_modified, fetched_at, accessed_at FROM fetched_content WHERE url = ?",
+        (url,)
+    ).fetchone()
+    if not row or (not allow_stale and row['fetched_at'] < time.time() - CONTENT_STORE_TTL):
+        return None
+    if row['accessed_at'] < time.time() - CACHE_TOUCH_INTERVAL:
+        conn.execute("UPDATE fetched_content SET accessed_at = ? WHERE url = ?", (time.time(), url))
+        conn.commit()
+    return dict(row)
+
+def store_content(url, content, etag=None, last_modified=None):
+    now = time.time()
+    conn = get_cache_connection()
+    conn.execute(
+        # A preview-only result (no text) never replaces a full page, which
+        # would lose its text and the validators used to revalidate it
+        f"""
+            INSERT INTO fetched_content
+                (url, {', '.join(CONTENT_FIELDS)}, etag, last_modified, fetched_at, accessed_at)
+            VALUES (?, {', '.join('?' for _ in CONTENT_FIELDS)}, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                {', '.join(f'{column} = excluded.{column}' for column in CONTENT_FIELDS + ('etag', 'last_modified', 'fetched_at', 'accessed_at'))}
+            WHERE excluded.text IS NOT NULL OR fetched_content.text IS NULL
+        """,
+        (url,) + tuple(content[field] for field in CONTENT_FIELDS) + (etag, last_modified, now, now)
+    )
+    # Drop pages too old to revalidate, then the least recently used above the cap
+    conn.execute("DELETE FROM fetched_content WHERE fetched_at < ?", (now - CONTENT_STORE_MAX_AGE,))
+    conn.execute(
+        """
+            DELETE FROM fetched_content WHERE url IN (
+                SELECT url FROM fetched_content ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        """,
+        (CONTENT_STORE_MAX_ENTRIES,)
+    )
+    conn.commit()
+
+def mark_content_fresh(url):
+    conn = get_cache_connection()
+    conn.execute("UPDATE fetched_content SET fetched_at = ? WHERE url = ?", (time.time(), url))
+    conn.commit()
+
+def get_stored_page(url):
+    """The stored entry for a page, fresh or stale, unless it only holds a preview."""
+    stored = get_stored_content(url, allow_stale=True)
+    # Entries written by the preview fetch have no text and need the full page
+    if stored and stored['text'] is None:
+        return None
+    return stored
+
+def is_fresh(stored):
+    return stored is not None and stored['fetched_at'] >= time.time() - CONTENT_STORE_TTL
+
+def fetch_article_content(url, timeout=10):
+    """Return the extracted text and preview metadata of an article page."""
+    stored = get_stored_page(url)
+    if is_fresh(stored):
+        count_cache_lookup('content', True)
+        return {field: stored[field] for field in CONTENT_FIELDS}
+    count_cache_lookup('content', False)
+    return page_flight.do(url, lambda: download_article_content(url, timeout))
+
+def download_article_content(url, timeout):
+    stored = get_stored_page(url)
+    # A leader in another worker may have stored the page while this one waited
+    if is_fresh(stored):
+        return {field: stored[field] for field in CONTENT_FIELDS}
+
+    headers = {}
+    if stored and stored['etag']:
+        headers['If-None-Match'] = stored['etag']
+    if stored and stored['last_modified']:
+        headers['If-Modified-Since'] = stored['last_modified']
+    timeout = begin_fetch(url, timeout)
+    with timed('fetch'):
+        start = time.monotonic()
+        try:
+            response = get_http_session().get(url, headers=headers, timeout=timeout)
+        except Exception as e:
+            end_fetch(url, error=str(e))
+            metrics.inc('mundus_outbound_fetches_total', kind='page', result='error')
+            raise
+        end_fetch(url, time.monotonic() - start, server_error(response))
+        if response.status_code == 304 and stored:
+            metrics.inc('mundus_outbound_fetches_total', kind='page', result='not_modified')
+            mark_content_fresh(url)
+            return {field: stored[field] for field in CONTENT_FIELDS}
+        metrics.inc('mundus_outbound_fetches_total', kind='page', result=str(response.status_code))
+        response.encoding = response.apparent_encoding or 'utf-8'
+        html = response.text
+
+    with timed('parse'):
+        content = parse_article_page(html, url, ok=response.ok)
+    # Error pages are still summarised as before, but not kept around. The
+    # status goes back with them (it isn't stored) so callers that would
+    # rather retry, like summary jobs, can tell.
+    content['http_status'] = response.status_code
+    if response.ok:
+        store_content(url, content, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+    return content
+
+# Previews only need a few tags that normally sit in <head>, so the preview
+# fetch streams the page and stops as soon as it has them, or at the byte cap.
+PREVIEW_MAX_BYTES = int(os.getenv('PREVIEW_MAX_BYTES', 256 * 1024))
+PREVIEW_CHUNK_SIZE = 8 * 1024
+
+class PreviewParser(HTMLParser):
+    def __init__(self, want_favicon=True):
+        super().__init__(convert_charrefs=True)
+        self.want_favicon = want_favicon
+        self.description = None
+        self.image = None
+        self.favicon = None
+        self.published = None
+        self.first_paragraph = None
+        self.paragraph_parts = None
+        self.skip_depth = 0
+        self.head_done = False
+
+    @property
+    def done(self):
+        if self.first_paragraph is not None:
+            return True
+        # The first <p> is only a fallback for a missing meta description
+        return self.head_done and self.description is not None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'meta':
+            if attrs.get('name') == 'description' and self.description is None:
+                self.description = attrs.get('content') or ''
+            elif attrs.get('property') == 'og:image' and self.image is None:
+                self.image = attrs.get('content')
+            elif attrs.get('property') == 'article:published_time' and self.published is None:
+                self.published = attrs.get('content')
+        elif tag == 'link' and self.want_favicon and self.favicon is None:
+            if 'icon' in (attrs.get('rel') or '').lower().split() and attrs.get('href'):
+                self.favicon = attrs['href']
+        elif tag in ('script', 'style'):
+            self.skip_depth += 1
+        elif tag == 'p' and self.first_paragraph is None:
+            if self.paragraph_parts is not None:
+                self.end_paragraph()
+            else:
+                self.paragraph_parts = []
+        elif tag == 'body':
+            self.head_done = True
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.head_done = True
+        elif tag in ('script', 'style') and self.skip_depth:
+            self.skip_depth -= 1
+        elif tag == 'p' and self.paragraph_parts is not None:
+            self.end_paragraph()
+
+    def handle_data(self, data):
+        if self.paragraph_parts is not None and not self.skip_depth:
+            self.paragraph_parts.append(data)
+
+    def end_paragraph(self):
+        self.first_paragraph = ''.join(self.paragraph_parts)
+        self.paragraph_parts = None
+
+def response_charset(response, first_chunk):
+    match = re.search(r'charset=["\']?([\w-]+)', response.headers.get('Content-Type', ''))
+    if not match:
+        match = re.search(rb'<meta[^>]+charset=["\']?([\w-]+)', first_chunk, re.IGNORECASE)
+        if match:
+            return match.group(1).decode('ascii')
+        return 'utf-8'
+    return match.group(1)
+
+def get_stored_preview(url):
+    """Stored content that can answer a preview, or None.
+
+    That is any fresh entry, or a full page even when stale: its metadata
+    rarely changes, and the next summarize revalidates it with the stored
+    ETag rather than a preview fetch overwriting it.
+    """
+    stored = get_stored_content(url, allow_stale=True)
+    if stored is not None and (is_fresh(stored) or stored['text'] is not None):
+        return stored
+    return None
+
+def fetch_article_preview(url, timeout=5):
+    """Return preview metadata for an article without downloading the whole page."""
+    stored = get_stored_preview(url)
+    count_cache_lookup('content', stored is not None)
+    if stored is not None:
+        return {field: stored[field] for field in CONTENT_FIELDS}
+    return preview_flight.do(url, lambda: download_article_preview(url, timeout))
+
+def download_article_preview(url, timeout):
+    stored = get_stored_preview(url)
+    # A leader in another worker may have stored the page while this one waited
+    if stored is not None:
+        return {field: stored[field] for field in CONTENT_FIELDS}
+
+    favicon = get_site_favicon(url)
+    parser = PreviewParser(want_favicon=favicon is None)
+    timeout = begin_fetch(url, timeout)
+    with timed('fetch'):
+        start = time.monotonic()
+        try:
+            response = get_http_session().get(url, timeout=timeout, stream=True)
+        except Exception as e:
+            end_fetch(url, error=str(e))
+            metrics.inc('mundus_outbound_fetches_total', kind='preview', result='error')
+            raise
+        # Streamed, so this is the time to the response headers
+        end_fetch(url, time.monotonic() - start, server_error(response))
+        with response:
+            metrics.inc('mundus_outbound_fetches_total', kind='preview', result=str(response.status_code))
+            decoder = None
+            received = 0
+            for chunk in response.iter_content(chunk_size=PREVIEW_CHUNK_SIZE):
+                if decoder is None:
+                    try:
+                        decoder = codecs.getincrementaldecoder(response_charset(response, chunk))(errors='replace')
+                    except LookupError:
+                        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+                parser.feed(decoder.decode(chunk))
+                received += len(chunk)
+                if parser.done or received >= PREVIEW_MAX_BYTES:
+                    break
+            ok = response.ok
+
+    if parser.first_paragraph is None and parser.paragraph_parts is not None:
+        parser.end_paragraph()
+    if favicon is None:
+        favicon = resolve_favicon(parser.favicon, url)
+        # Like the content, the favicon of an error page isn't kept
+        if ok:
+            store_site_favicon(url, favicon)
+    content = {
+        # No text: a later summarize still fetches the full page
+        'text': None,
+        'description': parser.description,
+        'first_paragraph': parser.first_paragraph or '',
+        'image': parser.image,
+        'favicon': favicon,
+        # Previews don't run htmldate; the Open Graph date is all they read
+        'published_date': parser.published[:10] if parser.published and re.match(r'\d{4}-\d{2}-\d{2}', parser.published) else None
+    }
+    if ok:
+        store_content(url, content)
+    return content
+
+# Concurrent publisher fetches. The pool bounds the total, and the per-host
+# semaphores keep a merge of five articles from one site from hammering it.
+FETCH_MAX_WORKERS = int(os.getenv('FETCH_MAX_WORKERS', 8))
+FETCH_PER_HOST_LIMIT = int(os.getenv('FETCH_PER_HOST_LIMIT', 2))
+FETCH_DEADLINE = float(os.getenv('FETCH_DEADLINE', 15))
+fetch_executor = None
+fetch_executor_pid = None
+host_semaphores = {}
+fetch_lock = threading.Lock()
+
+def get_fetch_executor():
+    global fetch_executor, fetch_executor_pid
+    with fetch_lock:
+        if fetch_executor_pid != os.getpid():
+            fetch_executor = ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS, thread_name_prefix='fetch')
+            fetch_executor_pid = os.getpid()
+        return fetch_executor
+
+# Readers for queries that span every country database
+db_executor = None
+db_executor_pid = None
+
+def get_db_executor():
+    global db_executor, db_executor_pid
+    with fetch_lock:
+        if db_executor_pid != os.getpid():
+            db_executor = ThreadPoolExecutor(max_workers=len(DATABASES), thread_name_prefix='db')
+            db_executor_pid = os.getpid()
+        return db_executor
+
+def host_semaphore(url):
+    host = urlparse(url).netloc
+    with fetch_lock:
+        semaphore = host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = host_semaphores[host] = threading.BoundedSemaphore(FETCH_PER_HOST_LIMIT)
+        return semaphore
+
+def iter_fetches(urls, timeout=10, deadline=FETCH_DEADLINE, fetch_function=None):
+    """Fetch article pages concurrently within an overall deadline.
+
+    Yields (url, content, error) as each page finishes. Pages still pending
+    when the deadline passes are yielded with an error rather than waited for.
+    `fetch_function` defaults to fetch_article_content.
+    """
+    fetch_function = fetch_function or fetch_article_content
+    expires_at = time.monotonic() + deadline
+
+    def fetch(url):
+        with host_semaphore(url):
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("Fetch deadline exceeded")
+            return fetch_function(url, timeout=min(timeout, remaining))
+
+    executor = get_fetch_executor()
+    # Run each fetch in a copy of this context so its stage timings still
+    # reach the request that started it
+    futures = {
+        executor.submit(contextvars.copy_context().run, fetch, url): url
+        for url in dict.fromkeys(urls)
+    }
+    finished = set()
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            finished.add(future)
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, str(e)
+    except FuturesTimeoutError:
+        for future, url in futures.items():
+            if future not in finished:
+                future.cancel()
+                yield url, None, "Fetch deadline exceeded"
+
+def fetch_many(urls, timeout=10, deadline=FETCH_DEADLINE, fetch_function=None):
+    """Fetch article pages concurrently; returns (contents, errors) keyed by URL."""
+    contents = {}
+    errors = {}
+    for url, content, error in iter_fetches(urls, timeout, deadline, fetch_function):
+        if error is None:
+            contents[url] = content
+        else:
+            errors[url] = error
+    return contents, errors
+
+SUMMARY_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+# Bump when the prompts below change so cached summaries of the old prompts
+# are no longer served.
+SUMMARY_PROMPT_VERSION = 1
+ARTICLE_SYSTEM_PROMPT = "You are a professional news analyst providing concise, objective summaries of news articles."
+MERGED_SYSTEM_PROMPT = "You are a professional news analyst providing comprehensive, objective summaries of multiple related news articles."
+
+def build_article_prompt(article, instructions, content_to_summarize):
+    return f"""Title: {article['title']}
+Source: {article['source']}
+Date: {article['published']}
+
+{instructions}
+
+Content to summarize:
+{content_to_summarize}
+
+Please provide:
+1. A compelling headline in bold that captures the essence of the article (distinct from the original title)
+2. A well-structured summary that includes:
+   - Key points
+   - Main arguments
+   - STAY FACTUAL AND OBJECTIVE - avoid loaded language and only summarise the facts reported in original article
+   - ONLY use British English - avoid Americanisms and other non-British English expressions. "Z" turn to "S" and "Center" turn to "Centre", Defence instead of Defense.
+   - Keep it short and concise - maximum 200 words.
+
+Format your response as:
+HEADLINE: [Your headline here]
+SUMMARY: [Your summary here]"""
+
+def build_merged_prompt(instructions, article_contents):
+    articles_text = "\n\n".join([
+        f"""Article {i+1}:
+Title: {article['title']}
+Source: {article['source']}
+Date: {article['date']}
+Content: {article['content']}"""
+        for i, article in enumerate(article_contents)
+    ])
+
+    return f"""{instructions}
+
+{articles_text}
+
+Please provide:
+1. A compelling headline in bold that captures the essence of the combined articles (distinct from the original titles)
+2. A comprehensive summary that includes:
+   - Key points from all articles
+   - Main arguments and their connections
+   - STAY FACTUAL AND OBJECTIVE - avoid loaded language and only summarise the facts reported in original articles
+   - ONLY use British English - avoid Americanisms and other non-British English expressions. "Z" turn to "S" and "Center" turn to "Centre", Defence instead of Defense.
+   - Keep it concise but comprehensive - maximum 400 words.
+   - Highlight any patterns, connections, or contradictions between the articles.
+
+Format your response as:
+HEADLINE: [Your headline here]
+SUMMARY: [Your summary here]"""
+
+def collect_merged_contents(articles, selected_text, fetched, fetch_errors):
+    """Pair each article with the content to summarise; returns (contents, failed)."""
+    article_contents = []
+    failed_articles = []
+    for article in articles:
+        if article['url'] in fetch_errors:
+            print(f"Error fetching article {article['url']}: {fetch_errors[article['url']]}")
+            failed_articles.append({
+                'url': article['url'],
+                'title': article.get('title'),
+                'error': fetch_errors[article['url']]
+            })
+            continue
+
+        content_to_summarize = selected_text if selected_text else fetched[article['url']]['text']
+        article_contents.append({
+            'title': article['title'],
+            'source': article['source'],
+            'date': article['published'],
+            'content': content_to_summarize
+        })
+    return article_contents, failed_articles
+
+openai_client = None
+openai_client_pid = None
+openai_client_lock = threading.Lock()
+
+def get_openai_client():
+    # Shared per process so its HTTP connection pool is reused between requests
+    global openai_client, openai_client_pid
+    with openai_client_lock:
+        if openai_client_pid != os.getpid():
+            openai_client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+            openai_client_pid = os.getpid()
+        return openai_client
+
+# Completed summaries keyed by (model, prompt version, instructions, hash of the
+# prompt actually sent), so repeat summaries of an article cost no tokens.
+SUMMARY_CACHE_TTL = int(os.getenv('SUMMARY_CACHE_TTL', 7 * 24 * 60 * 60))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv('SUMMARY_CACHE_MAX_ENTRIES', 2000))
+summary_cache_stats = {'hits': 0, 'misses': 0}
+summary_cache_stats_lock = threading.Lock()
+
+def summary_cache_key(system_prompt, prompt, instructions, max_tokens):
+    content_hash = hashlib.sha256(f"{system_prompt}\n{prompt}".encode('utf-8')).hexdigest()
+    key = json.dumps([SUMMARY_MODEL, SUMMARY_PROMPT_VERSION, instructions, content_hash, max_tokens])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+def count_summary_cache(outcome):
+    with summary_cache_stats_lock:
+        summary_cache_stats[outcome] += 1
+    count_cache_lookup('summary', outcome == 'hits')
+
+def record_openai_usage(usage, result='ok'):
+    endpoint = current_endpoint()
+    metrics.inc('mundus_openai_requests_total', endpoint=endpoint, result=result)
+    if usage is not None:
+        metrics.inc('mundus_openai_tokens_total', usage.prompt_tokens, endpoint=endpoint, type='prompt')
+        metrics.inc('mundus_openai_tokens_total', usage.completion_tokens, endpoint=endpoint, type='completion')
+
+def get_cached_summary(key, newer_than=0):
+    conn = get_cache_connection()
+    row = conn.execute(
+        "SELECT summary, accessed_at FROM summary_cache WHERE key = ? AND created_at >= ?",
+        (key, max(time.time() - SUMMARY_CACHE_TTL, newer_than))
+    ).fetchone()
+    if row:
+        if row['accessed_at'] < time.time() - CACHE_TOUCH_INTERVAL:
+            conn.execute("UPDATE summary_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+        return row['summary']
+    return None
+
+def store_summary(key, summary):
+    now = time.time()
+    conn = get_cache_connection()
+    conn.execute(
+        "INSERT OR REPLACE INTO summary_cache (key, summary, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+        (key, summary, now, now)
+    )
+    conn.execute("DELETE FROM summary_cache WHERE created_at < ?", (now - SUMMARY_CACHE_TTL,))
+    conn.execute(
+        """
+            DELETE FROM summary_cache WHERE key IN (
+                SELECT key FROM summary_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        """,
+        (SUMMARY_CACHE_MAX_ENTRIES,)
+    )
+    conn.commit()
+
+def complete_summary(system_prompt, prompt, instructions, max_tokens, no_cache=False):
+    """Return (summary, cached) for a prompt, calling OpenAI only on a cache miss.
+
+    `no_cache` skips the lookup but still stores the fresh summary.
+    """
+    key = summary_cache_key(system_prompt, prompt, instructions, max_tokens)
+    if not no_cache:
+        summary = get_cached_summary(key)
+        if summary is not None:
+            count_summary_cache('hits')
+            return summary, True
+        count_summary_cache('misses')
+
+    requested_at = time.time()
+
+    def generate():
+        # A leader in another worker may have stored this summary while this
+        # one waited; with no_cache only a summary made since then will do.
+        summary = get_cached_summary(key, newer_than=requested_at if no_cache else 0)
+        if summary is not None:
+            return summary
+        with timed('llm'):
+            try:
+                response = get_openai_client().chat.completions.create(
+                    model=SUMMARY_MODEL,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.2,
+                    max_tokens=max_tokens
+                )
+            except Exception:
+                record_openai_usage(None, result='error')
+                raise
+        record_openai_usage(response.usage)
+        summary = response.choices[0].message.content
+        store_summary(key, summary)
+        return summary
+
+    # The key covers the prompt's content hash and the instructions, so
+    # identical concurrent requests share one completion
+    return summary_flight.do(key, generate), False
+
+def stream_summary(system_prompt, prompt, instructions, max_tokens, no_cache=False):
+    """Like complete_summary(), but yields (text, cached) pieces as they arrive."""
+    key = summary_cache_key(system_prompt, prompt, instructions, max_tokens)
+    if not no_cache:
+        summary = get_cached_summary(key)
+        if summary is not None:
+            count_summary_cache('hits')
+            yield summary, True
+            return
+        count_summary_cache('misses')
+
+    parts = []
+    try:
+        stream = get_openai_client().chat.completions.create(
+            model=SUMMARY_MODEL,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.2,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if text:
+                parts.append(text)
+                yield text, False
+    except Exception:
+        # A client going away raises GeneratorExit, which isn't an OpenAI error
+        record_openai_usage(None, result='error')
+        raise
+    # Streamed completions don't report usage
+    record_openai_usage(None)
+    store_summary(key, ''.join(parts))
+
+# Token-budgeted summarisation. Content that fits its budget goes to the model
+# as is; longer content is split into chunks that are condensed in parallel
+# (map), and the notes take the content's place in the usual HEADLINE/SUMMARY
+# prompt (reduce). Notes that are still over budget are condensed again.
+SUMMARY_ARTICLE_TOKENS = int(os.getenv('SUMMARY_ARTICLE_TOKENS', 6000))
+SUMMARY_MERGED_TOKENS = int(os.getenv('SUMMARY_MERGED_TOKENS', 10000))
+SUMMARY_CHUNK_TOKENS = int(os.getenv('SUMMARY_CHUNK_TOKENS', 2000))
+SUMMARY_NOTES_MAX_TOKENS = int(os.getenv('SUMMARY_NOTES_MAX_TOKENS', 300))
+SUMMARY_MAP_CONCURRENCY = int(os.getenv('SUMMARY_MAP_CONCURRENCY', 4))
+SUMMARY_MAP_ROUNDS = 3
+CHUNK_SYSTEM_PROMPT = "You are a professional news analyst taking accurate, objective notes on part of a news article."
+token_encoding = None
+summary_executor = None
+summary_executor_pid = None
+summary_lock = threading.Lock()
+
+def estimate_tokens(text):
+    """Token count of `text` for the summary model, or ~4 characters per token without tiktoken."""
+    global token_encoding
+    if tiktoken is None:
+        return len(text) // 4 + 1
+    if token_encoding is None:
+        try:
+            token_encoding = tiktoken.encoding_for_model(SUMMARY_MODEL)
+        except KeyError:
+            token_encoding = tiktoken.get_encoding('cl100k_base')
+    return len(token_encoding.encode(text, disallowed_special=()))
+
+def chunk_text(text, max_tokens):
+    """Split text into chunks of at most ~max_tokens, on paragraph boundaries where possible."""
+    pieces = []
+    for paragraph in re.split(r'\n\s*\n|\n', text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_tokens:
+            pieces.append(paragraph)
+            continue
+        # A single oversized paragraph is split between words
+        words = paragraph.split()
+        step = max(1, len(words) * max_tokens // estimate_tokens(paragraph))
+        pieces.extend(' '.join(words[i:i + step]) for i in range(0, len(words), step))
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for piece in pieces:
+        piece_tokens = estimate_tokens(piece)
+        if current and current_tokens + piece_tokens > max_tokens:
+            chunks.append('\n\n'.join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += piece_tokens
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+def truncate_to_tokens(text, max_tokens):
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return chunk_text(text, max_tokens)[0]
+
+def build_chunk_prompt(title, instructions, chunk, index, total):
+    return f"""The following is part {index} of {total} of the news article "{title}".
+
+{instructions}
+
+Text:
+{chunk}
+
+Write concise notes on this part only: the facts, names, figures, quotes and conclusions it reports, in the order they appear. Do not add anything that is not in the text. Maximum 150 words."""
+
+def get_summary_executor():
+    global summary_executor, summary_executor_pid
+    with summary_lock:
+        if summary_executor_pid != os.getpid():
+            summary_executor = ThreadPoolExecutor(max_workers=SUMMARY_MAP_CONCURRENCY, thread_name_prefix='summary')
+            summary_executor_pid = os.getpid()
+        return summary_executor
+
+def condense_contents(items, budgets, instructions, no_cache=False):
+    """Bring each item's content within its token budget; returns the new contents.
+
+    `items` are dicts with `title` and `content`. Every chunk of every
+    over-budget item is condensed in the same parallel round.
+    """
+    contents = [item['content'] for item in items]
+    for _ in range(SUMMARY_MAP_ROUNDS):
+        jobs = []
+        for position, (item, content, budget) in enumerate(zip(items, contents, budgets)):
+            if estimate_tokens(content) > budget:
+                chunks = chunk_text(content, SUMMARY_CHUNK_TOKENS)
+                jobs.extend(
+                    (position, build_chunk_prompt(item['title'], instructions, chunk, index, len(chunks)))
+                    for index, chunk in enumerate(chunks, 1)
+                )
+        if not jobs:
+            return contents
+
+        def condense(prompt):
+            summary, _ = complete_summary(
+                CHUNK_SYSTEM_PROMPT, prompt, instructions,
+                max_tokens=SUMMARY_NOTES_MAX_TOKENS, no_cache=no_cache
+            )
+            return summary
+
+        executor = get_summary_executor()
+        # A fresh context copy per task, so stage timings reach this request
+        futures = [executor.submit(contextvars.copy_context().run, condense, prompt) for _, prompt in jobs]
+        notes = {}
+        for (position, _), future in zip(jobs, futures):
+            notes.setdefault(position, []).append(future.result())
+        for position, parts in notes.items():
+            contents[position] = '\n\n'.join(parts)
+
+    # Still over budget after every round: cut what's left
+    return [truncate_to_tokens(content, budget) for content, budget in zip(contents, budgets)]
+
+def prepare_article_content(article, instructions, content, no_cache=False):
+    """Content for build_article_prompt(), condensed to SUMMARY_ARTICLE_TOKENS."""
+    item = {'title': article.get('title', ''), 'content': content}
+    return condense_contents([item], [SUMMARY_ARTICLE_TOKENS], instructions, no_cache)[0]
+
+def prepare_merged_contents(article_contents, instructions, no_cache=False):
+    """Share SUMMARY_MERGED_TOKENS between the articles of a merge and condense each to its share.
+
+    Short articles keep their full text and leave their unused share to the
+    longer ones.
+    """
+    sizes = [estimate_tokens(article['content']) for article in article_contents]
+    budgets = [0] * len(sizes)
+    remaining = SUMMARY_MERGED_TOKENS
+    # Smallest first, so each article gets the lesser of its size and an even
+    # share of what the articles before it left over
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    for rank, i in enumerate(order):
+        share = remaining // (len(order) - rank)
+        budgets[i] = max(1, min(sizes[i], share))
+        remaining -= budgets[i]
+
+    contents = condense_contents(article_contents, budgets, instructions, no_cache)
+    return [dict(article, content=content) for article, content in zip(article_contents, contents)]
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def sse_response(events):
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        # Stop proxies from buffering the stream until it ends
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def stream_summary_events(system_prompt, prompt, instructions, max_tokens, no_cache, extra=None):
+    yield sse_event('progress', {'stage': 'generating'})
+    parts = []
+    cached = False
+    for text, cached in stream_summary(system_prompt, prompt, instructions, max_tokens, no_cache):
+        parts.append(text)
+        yield sse_event('token', {'content': text})
+    yield sse_event('done', {'summary': ''.join(parts), 'cached': cached, **(extra or {})})
+
+# Background content warmer. It follows `scraped_at` in each country database
+# and fetches new articles into the content store, so the first editor to open
+# a fresh story gets its preview and text from the store. Runs standalone with
+# `flask warm-content`, or inside the web workers with CONTENT_WARMER_ENABLED=1.
+# Every gunicorn worker then starts a warmer, but only the one holding the lock
+# file next to the cache polls and queues articles, so each is fetched once;
+# if that worker exits another takes over on its next poll.
+WARMER_POLL_INTERVAL = float(os.getenv('WARMER_POLL_INTERVAL', 60))
+WARMER_LOOKBACK_HOURS = int(os.getenv('WARMER_LOOKBACK_HOURS', 6))
+WARMER_BATCH_SIZE = int(os.getenv('WARMER_BATCH_SIZE', 200))
+WARMER_QUEUE_SIZE = int(os.getenv('WARMER_QUEUE_SIZE', 500))
+WARMER_WORKERS = int(os.getenv('WARMER_WORKERS', 4))
+WARMER_DOMAIN_INTERVAL = float(os.getenv('WARMER_DOMAIN_INTERVAL', 2))
+
+class ContentWarmer:
+    def __init__(self, countries=None):
+        self.countries = list(countries or DATABASES.keys())
+        self.queue = queue.Queue(maxsize=WARMER_QUEUE_SIZE)
+        self.stop_event = threading.Event()
+        self.domain_next_fetch = {}
+        self.domain_lock = threading.Lock()
+        self.threads = []
+        self.lock_file = None
+
+    def acquire_lock(self):
+        """Whether this warmer is the one that polls; the lock is held until stop()."""
+        if fcntl is None:
+            return True
+        if self.lock_file is None:
+            self.lock_file = open(f"{CACHE_DB_PATH}.warmer.lock", 'a')
+        try:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def release_lock(self):
+        if self.lock_file is not None:
+            self.lock_file.close()
+            self.lock_file = None
+
+    def get_watermark(self, country_code):
+        row = get_cache_connection().execute(
+            "SELECT scraped_at, article_id FROM warmer_state WHERE country = ?", (country_code,)
+        ).fetchone()
+        if row:
+            return row['scraped_at'], row['article_id']
+        # First run: only warm recent articles rather than the whole archive
+        return (datetime.now() - timedelta(hours=WARMER_LOOKBACK_HOURS)).isoformat(), 0
+
+    def set_watermark(self, country_code, scraped_at, article_id):
+        conn = get_cache_connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO warmer_state (country, scraped_at, article_id) VALUES (?, ?, ?)",
+            (country_code, scraped_at, article_id)
+        )
+        conn.commit()
+
+    def poll(self):
+        """Queue articles scraped since the last poll; returns how many were queued."""
+        queued = 0
+        for country_code in self.countries:
+            scraped_at, article_id = self.get_watermark(country_code)
+            with db_connection(country_code) as conn:
+                rows = conn.execute(
+                    """
+                        SELECT id, url, scraped_at FROM articles
+                        WHERE scraped_at > ? OR (scraped_at = ? AND id > ?)
+                        ORDER BY scraped_at, id
+                        LIMIT ?
+                    """,
+                    (scraped_at, scraped_at, article_id, WARMER_BATCH_SIZE)
+                ).fetchall()
+            for row in rows:
+                try:
+                    self.queue.put(row['url'], timeout=WARMER_POLL_INTERVAL)
+                except queue.Full:
+                    # Workers are behind; pick up from this row next poll
+                    break
+                queued += 1
+                self.set_watermark(country_code, row['scraped_at'], row['id'])
+        return queued
+
+    def wait_for_domain(self, url):
+        domain = urlparse(url).netloc
+        with self.domain_lock:
+            now = time.monotonic()
+            next_fetch = max(now, self.domain_next_fetch.get(domain, now))
+            self.domain_next_fetch[domain] = next_fetch + WARMER_DOMAIN_INTERVAL
+        self.stop_event.wait(next_fetch - now)
+
+    def work(self):
+        while not self.stop_event.is_set():
+            try:
+                url = self.queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                stored = get_stored_content(url)
+                if stored is None or stored['text'] is None:
+                    self.wait_for_domain(url)
+                    fetch_article_content(url, timeout=10)
+            except Exception as e:
+                print(f"Content warmer failed to fetch {url}: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+    def run_poller(self):
+        while not self.stop_event.is_set():
+            try:
+                if self.acquire_lock():
+                    self.poll()
+            except Exception as e:
+                print(f"Content warmer poll failed: {str(e)}")
+            self.stop_event.wait(WARMER_POLL_INTERVAL)
+
+    def start(self):
+        for i in range(WARMER_WORKERS):
+            self.threads.append(threading.Thread(target=self.work, name=f'warmer-{i}', daemon=True))
+        self.threads.append(threading.Thread(target=self.run_poller, name='warmer-poller', daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join()
+        self.release_lock()
+
+content_warmer_pid = None
+content_warmer_lock = threading.Lock()
+
+@app.before_request
+def start_content_warmer():
+    global content_warmer_pid
+    if os.getenv('CONTENT_WARMER_ENABLED') != '1' or content_warmer_pid == os.getpid():
+        return
+    with content_warmer_lock:
+        if content_warmer_pid != os.getpid():
+            ContentWarmer().start()
+            content_warmer_pid = os.getpid()
+
+@app.cli.command('warm-content')
+@click.argument('countries', nargs=-1)
+@click.option('--once', is_flag=True, help='Warm what is new since the last run, then exit.')
+def warm_content_command(countries, once):
+    """Prefetch newly scraped articles into the content store."""
+    warmer = ContentWarmer(countries)
+    if once:
+        if not warmer.acquire_lock():
+            click.echo("Another warmer is running; nothing to do")
+            return
+        for i in range(WARMER_WORKERS):
+            threading.Thread(target=warmer.work, daemon=True).start()
+        while warmer.poll():
+            warmer.queue.join()
+        warmer.queue.join()
+        warmer.stop_event.set()
+        warmer.release_lock()
+        return
+    warmer.start()
+    click.echo(f"Warming {', '.join(warmer.countries)} every {WARMER_POLL_INTERVAL:g}s (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        warmer.stop()
+
+# Bulk summary jobs. A client submits article ids to POST /api/summary-jobs and
+# follows the job by polling GET /api/summary-jobs/<id> or streaming its
+# /events. Jobs live in their own database (JOBS_DB_PATH) rather than the
+# cache, which is thrown away on schema changes, so queued work survives
+# restarts. SummaryWorker threads claim one item at a time; run them with
+# `flask run-summary-worker`, or inside the web workers with
+# SUMMARY_WORKER_ENABLED=1. Each worker process summarises at most
+# SUMMARY_JOB_CONCURRENCY articles at once, and all of them together keep their
+# estimated OpenAI use under SUMMARY_JOB_TPM tokens per minute.
+JOBS_DB_PATH = os.getenv('JOBS_DB_PATH', 'mundus_jobs.db')
+SUMMARY_JOB_MAX_ARTICLES = int(os.getenv('SUMMARY_JOB_MAX_ARTICLES', 100))
+SUMMARY_JOB_CONCURRENCY = int(os.getenv('SUMMARY_JOB_CONCURRENCY', 4))
+SUMMARY_JOB_TPM = int(os.getenv('SUMMARY_JOB_TPM', 60000))
+SUMMARY_JOB_MAX_ATTEMPTS = int(os.getenv('SUMMARY_JOB_MAX_ATTEMPTS', 5))
+SUMMARY_JOB_RETRY_DELAY = float(os.getenv('SUMMARY_JOB_RETRY_DELAY', 10))
+SUMMARY_JOB_POLL_INTERVAL = float(os.getenv('SUMMARY_JOB_POLL_INTERVAL', 1))
+# Items left running this long belong to a worker that died and are requeued
+SUMMARY_JOB_LEASE = 15 * 60
+# Prompt template and the 500-token answer, on top of the article itself
+SUMMARY_JOB_OVERHEAD_TOKENS = 1000
+JOBS_SCHEMA = [
+    """
+        CREATE TABLE IF NOT EXISTS summary_jobs (
+            id TEXT PRIMARY KEY,
+            country TEXT NOT NULL,
+            instructions TEXT NOT NULL,
+            no_cache INTEGER NOT NULL,
+            total INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            finished_at REAL
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS summary_job_items (
+            id INTEGER PRIMARY KEY,
+            job_id TEXT NOT NULL REFERENCES summary_jobs(id),
+            position INTEGER NOT NULL,
+            article TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            available_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            summary TEXT,
+            cached INTEGER,
+            error TEXT
+        )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_summary_job_items_job ON summary_job_items(job_id, position)",
+    "CREATE INDEX IF NOT EXISTS idx_summary_job_items_queue ON summary_job_items(status, available_at)",
+    """
+        CREATE TABLE IF NOT EXISTS token_buckets (
+            name TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    """,
+]
+# Failures worth another attempt later; anything else fails the item
+TRANSIENT_JOB_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    # Raised by SummaryWorker for a publisher 5xx
+    requests.exceptions.HTTPError,
+)
+jobs_local = threading.local()
+
+def get_jobs_connection():
+    # Same per-thread WAL setup as the cache, without the drop-on-upgrade
+    conn = getattr(jobs_local, 'conn', None)
+    if conn is None or jobs_local.pid != os.getpid():
+        conn = sqlite3.connect(JOBS_DB_PATH, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        with conn:
+            for statement in JOBS_SCHEMA:
+                conn.execute(statement)
+        jobs_local.conn = conn
+        jobs_local.pid = os.getpid()
     return conn
 
+def create_summary_job(country_code, articles, instructions, no_cache):
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    conn = get_jobs_connection()
+    with conn:
+        conn.execute(
+            "INSERT INTO summary_jobs (id, country, instructions, no_cache, total, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, country_code, instructions, int(no_cache), len(articles), now)
+        )
+        conn.executemany(
+            """
+                INSERT INTO summary_job_items (job_id, position, article, status, available_at, updated_at)
+                VALUES (?, ?, ?, 'queued', ?, ?)
+            """,
+            [(job_id, position, json.dumps(article), now, now) for position, article in enumerate(articles)]
+        )
+    return job_id
+
+def load_summary_job(job_id):
+    """The job with its counts and items, or None if there is no such job."""
+    conn = get_jobs_connection()
+    job = conn.execute("SELECT * FROM summary_jobs WHERE id = ?", (job_id,)).fetchone()
+    if job is None:
+        return None
+    items = conn.execute(
+        """
+            SELECT position, article, status, attempts, summary, cached, error
+            FROM summary_job_items WHERE job_id = ? ORDER BY position
+        """,
+        (job_id,)
+    ).fetchall()
+    counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0}
+    for item in items:
+        counts[item['status']] += 1
+    if job['finished_at'] is not None:
+        status = 'finished'
+    elif counts['queued'] == job['total']:
+        status = 'queued'
+    else:
+        status = 'running'
+    return {
+        'id': job['id'],
+        'country': job['country'],
+        'instructions': job['instructions'],
+        'status': status,
+        'total': job['total'],
+        'counts': counts,
+        'created_at': datetime.fromtimestamp(job['created_at']).isoformat(),
+        'finished_at': datetime.fromtimestamp(job['finished_at']).isoformat() if job['finished_at'] else None,
+        'items': [
+            {
+                **dict(item),
+                'article': json.loads(item['article']),
+                'cached': bool(item['cached']) if item['cached'] is not None else None
+            }
+            for item in items
+        ]
+    }
+
+def claim_job_item():
+    """Mark the next due item running and return it, or None when nothing is due."""
+    conn = get_jobs_connection()
+    now = time.time()
+    # IMMEDIATE takes the write lock up front, so two workers can't claim one item
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        item = conn.execute(
+            """
+                SELECT items.id, items.job_id, items.article, items.attempts, jobs.instructions, jobs.no_cache
+                FROM summary_job_items items JOIN summary_jobs jobs ON jobs.id = items.job_id
+                WHERE (items.status = 'queued' AND items.available_at <= ?)
+                   OR (items.status = 'running' AND items.updated_at < ?)
+                ORDER BY items.available_at, items.id
+                LIMIT 1
+            """,
+            (now, now - SUMMARY_JOB_LEASE)
+        ).fetchone()
+        if item is not None:
+            conn.execute(
+                "UPDATE summary_job_items SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (now, item['id'])
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return item
+
+def finish_job_item(item, status, summary=None, cached=None, error=None, retry_at=None, undo_attempt=False):
+    """Record how an item went; `undo_attempt` hands back the attempt its claim counted."""
+    now = time.time()
+    conn = get_jobs_connection()
+    with conn:
+        conn.execute(
+            """
+                UPDATE summary_job_items
+                SET status = ?, summary = ?, cached = ?, error = ?, available_at = ?, updated_at = ?,
+                    attempts = attempts - ?
+                WHERE id = ?
+            """,
+            (status, summary, cached, error, retry_at or now, now, int(undo_attempt), item['id'])
+        )
+        conn.execute(
+            """
+                UPDATE summary_jobs SET finished_at = ?
+                WHERE id = ? AND finished_at IS NULL AND NOT EXISTS (
+                    SELECT 1 FROM summary_job_items
+                    WHERE job_id = ? AND status IN ('queued', 'running')
+                )
+            """,
+            (now, item['job_id'], item['job_id'])
+        )
+
+class TokenBucket:
+    """Tokens-per-minute limiter; take() waits until the tokens are available.
+
+    The bucket lives in the jobs database, so every worker process, whether
+    `flask run-summary-worker` or inside each gunicorn worker, draws on the
+    same budget.
+    """
+
+    def __init__(self, name, per_minute):
+        self.name = name
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+
+    def take(self, tokens, stop_event):
+        """Returns False if stop_event is set while waiting."""
+        # A request bigger than a whole minute's budget waits for a full bucket
+        tokens = min(tokens, self.capacity)
+        while True:
+            conn = get_jobs_connection()
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT tokens, updated_at FROM token_buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                if row is None:
+                    available = self.capacity
+                else:
+                    available = min(self.capacity, row['tokens'] + max(0, now - row['updated_at']) * self.rate)
+                granted = available >= tokens
+                if granted:
+                    available -= tokens
+                conn.execute(
+                    "INSERT OR REPLACE INTO token_buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    (self.name, available, now)
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            if granted:
+                return True
+            # Other processes draw on the bucket too, so look again rather
+            # than sleep for the whole shortfall
+            if stop_event.wait(min((tokens - available) / self.rate, 5)):
+                return False
+
+    def give_back(self, tokens):
+        """Return tokens taken for work that turned out not to need OpenAI."""
+        conn = get_jobs_connection()
+        with conn:
+            conn.execute(
+                "UPDATE token_buckets SET tokens = MIN(?, tokens + ?) WHERE name = ?",
+                (self.capacity, min(tokens, self.capacity), self.name)
+            )
+
+def estimate_summary_tokens(content):
+    """Rough OpenAI token use of summarising `content`, for the TPM limit."""
+    tokens = estimate_tokens(content)
+    if tokens > SUMMARY_ARTICLE_TOKENS:
+        # Map calls read the whole article, then the reduce call reads their notes
+        chunks = tokens // SUMMARY_CHUNK_TOKENS + 1
+        tokens += chunks * SUMMARY_NOTES_MAX_TOKENS * 2
+    return tokens + SUMMARY_JOB_OVERHEAD_TOKENS
+
+class SummaryWorker:
+    def __init__(self, concurrency=SUMMARY_JOB_CONCURRENCY):
+        self.concurrency = concurrency
+        self.token_bucket = TokenBucket('openai', SUMMARY_JOB_TPM)
+        self.stop_event = threading.Event()
+        self.threads = []
+
+    def process(self, item):
+        article = json.loads(item['article'])
+        try:
+            fetched = fetch_article_content(article['url'], timeout=10)
+            # Unlike an editor waiting on /api/summarize, a job can come back
+            # later rather than summarise the publisher's error page
+            if fetched.get('http_status', 200) >= 500:
+                raise requests.exceptions.HTTPError(f"Publisher returned HTTP {fetched['http_status']}")
+            content = fetched['text']
+            summary = self.cached_summary(article, item, content)
+            cached = summary is not None
+            if not cached:
+                tokens = estimate_summary_tokens(content)
+                if not self.token_bucket.take(tokens, self.stop_event):
+                    # Shutting down: hand the item straight back to the queue,
+                    # without counting a restart against its attempts
+                    finish_job_item(item, 'queued', error=None, undo_attempt=True)
+                    return
+                content = prepare_article_content(article, item['instructions'], content, bool(item['no_cache']))
+                prompt = build_article_prompt(article, item['instructions'], content)
+                summary, cached = complete_summary(
+                    ARTICLE_SYSTEM_PROMPT, prompt, item['instructions'],
+                    max_tokens=500, no_cache=bool(item['no_cache'])
+                )
+                if cached:
+                    self.token_bucket.give_back(tokens)
+        except TRANSIENT_JOB_ERRORS as e:
+            if item['attempts'] + 1 >= SUMMARY_JOB_MAX_ATTEMPTS:
+                print(f"Summary job item {item['id']} failed after {item['attempts'] + 1} attempts: {str(e)}")
+                finish_job_item(item, 'failed', error=str(e))
+                return
+            # Exponential backoff with jitter, so retries don't arrive together
+            delay = SUMMARY_JOB_RETRY_DELAY * 2 ** item['attempts'] * random.uniform(0.5, 1.5)
+            print(f"Summary job item {item['id']} will retry in {delay:.0f}s: {str(e)}")
+            finish_job_item(item, 'queued', error=str(e), retry_at=time.time() + delay)
+            return
+        except Exception as e:
+            print(f"Summary job item {item['id']} failed: {str(e)}")
+            finish_job_item(item, 'failed', error=str(e))
+            return
+        finish_job_item(item, 'done', summary=summary, cached=int(cached))
+
+    def cached_summary(self, article, item, content):
+        """The cached summary of an article that needs no condensing, if there is one.
+
+        Such an article's prompt is known before any OpenAI call, so a cache
+        hit is answered without waiting on the TPM budget.
+        """
+        if item['no_cache'] or estimate_tokens(content) > SUMMARY_ARTICLE_TOKENS:
+            return None
+        prompt = build_article_prompt(article, item['instructions'], content)
+        summary = get_cached_summary(summary_cache_key(ARTICLE_SYSTEM_PROMPT, prompt, item['instructions'], 500))
+        if summary is not None:
+            count_summary_cache('hits')
+        return summary
+
+    def work(self, until_empty=False):
+        while not self.stop_event.is_set():
+            try:
+                item = claim_job_item()
+            except Exception as e:
+                print(f"Summary worker failed to claim an item: {str(e)}")
+                item = None
+            if item is None:
+                if until_empty:
+                    return
+                self.stop_event.wait(SUMMARY_JOB_POLL_INTERVAL)
+                continue
+            self.process(item)
+
+    def start(self, until_empty=False):
+        for i in range(self.concurrency):
+            self.threads.append(threading.Thread(
+                target=self.work, args=(until_empty,), name=f'summary-worker-{i}', daemon=True
+            ))
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join()
+
+summary_worker_pid = None
+summary_worker_lock = threading.Lock()
+
+@app.before_request
+def start_summary_worker():
+    global summary_worker_pid
+    if os.getenv('SUMMARY_WORKER_ENABLED') != '1' or summary_worker_pid == os.getpid():
+        return
+    with summary_worker_lock:
+        if summary_worker_pid != os.getpid():
+            SummaryWorker().start()
+            summary_worker_pid = os.getpid()
+
+@app.cli.command('run-summary-worker')
+@click.option('--once', is_flag=True, help='Work through the items that are due, then exit.')
+@click.option('--concurrency', type=int, default=SUMMARY_JOB_CONCURRENCY, show_default=True,
+              help='Articles summarised at once.')
+def run_summary_worker_command(once, concurrency):
+    """Process queued bulk summary jobs."""
+    worker = SummaryWorker(concurrency)
+    worker.start(until_empty=once)
+    if once:
+        for thread in worker.threads:
+            thread.join()
+        return
+    click.echo(f"Processing summary jobs from {JOBS_DB_PATH} with {concurrency} workers (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        worker.stop()
+
+@app.cli.command('migrate-db')
+@click.argument('countries', nargs=-1)
+@click.option('--rebuild', is_flag=True, help='Rebuild the search index even if it already exists.')
+def migrate_db_command(countries, rebuild):
+    """Create search and list indexes in the country databases."""
+    for country_code in countries or DATABASES.keys():
+        rebuilt = migrate_database(country_code, rebuild=rebuild)
+        click.echo(f"{country_code}: migrated{' (search index rebuilt)' if rebuilt else ''}")
+
+# Representative list queries checked by `flask explain-articles`
+EXPLAIN_FILTERS = [
+    {},
+    {'source': 'example'},
+    {'category': 'example'},
+    {'time_filter': '24'},
+    {'source': 'example', 'time_filter': '24'},
+    {'category': 'example', 'time_filter': '24'},
+    {'search_query': 'example'},
+]
+
+def explain_article_query(conn, **filters):
+    article_filter = build_article_filter(conn, **filters)
+    query = f"""
+        SELECT articles.id FROM articles {article_filter.join} {article_filter.where}
+        ORDER BY {article_filter.order_by} LIMIT 10
+    """
+    return [row['detail'] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", article_filter.params)]
+
+@app.cli.command('explain-articles')
+@click.argument('countries', nargs=-1)
+def explain_articles_command(countries):
+    """Show the query plans of the article list and flag full scans."""
+    for country_code in countries or DATABASES.keys():
+        conn = get_db_connection(country_code)
+        try:
+            indexes = {row['name'] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'articles'"
+            )}
+            click.echo(f"{country_code}:")
+            for statement in ARTICLE_INDEX_SCHEMA:
+                name = statement.split(' ON ')[0].split()[-1]
+                if name not in indexes:
+                    click.echo(f"  missing index {name} (run `flask migrate-db`)")
+            for filters in EXPLAIN_FILTERS:
+                plan = explain_article_query(conn, **filters)
+                # An ordered walk of an index stops at LIMIT; a bare table scan doesn't
+                full_scan = any(step == 'SCAN articles' for step in plan)
+                temp_sort = any('TEMP B-TREE' in step for step in plan)
+                label = ', '.join(f"{key}={value}" for key, value in filters.items()) or 'no filters'
+                warnings = ' '.join(flag for flag, hit in (('[FULL SCAN]', full_scan), ('[SORT]', temp_sort)) if hit)
+                click.echo(f"  {label}: {' | '.join(plan)} {warnings}".rstrip())
+        finally:
+            conn.close()
+
 # Root route
 @app.route('/')
 def index():
@@ -68,58 +2457,273 @@ def get_articles(country):
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 10))
         time_filter = request.args.get('time', '')
+        sort = request.args.get('sort', 'recent')
+        count_mode = request.args.get('count', 'exact')
+        if count_mode not in ('exact', 'estimate', 'none'):
+            return jsonify({"error": "count must be one of exact, estimate, none"}), 400
+        # Passing `cursor` (empty for the first page) switches to keyset paging
+        cursor = request.args.get('cursor')
+        if cursor is not None and sort == 'relevance':
+            return jsonify({"error": "Cursor pagination is only supported for sort=recent"}), 400
+        if cursor:
+            try:
+                cursor_published, cursor_id = decode_cursor(cursor)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
         
-        conn = get_db_connection(country)
-        
-        time_condition = ""
-        time_params = []
-        if time_filter:
-            hours = int(time_filter)
-            cutoff_time = (datetime.now() - timedelta(hours=hours)).isoformat()
-            time_condition = "AND published >= ?"
-            time_params = [cutoff_time]
-        
-        count_query = f"""
-            SELECT COUNT(*) as total
-            FROM articles 
-            WHERE (? = '' OR LOWER(title) LIKE LOWER(?))
-            AND (? = '' OR source = ?)
-            AND (? = '' OR AI_tag = ?)
-            {time_condition}
-        """
-        search_pattern = f"%{search_query}%"
-        total_count = conn.execute(count_query, 
-                                 (search_query, search_pattern,
-                                  source, source,
-                                  category, category) + tuple(time_params)).fetchone()['total']
-        
-        offset = (page - 1) * per_page
+        with db_connection(country) as conn:
+            article_filter = build_article_filter(
+                conn, search_query, source, category, time_filter, sort
+            )
+            from_where = f"FROM articles {article_filter.join} {article_filter.where}"
+            total_count, total_is_estimate = count_articles(
+                conn, country, article_filter.cache_key,
+                from_where, article_filter.params, count_mode
+            )
+            total_pages = (total_count + per_page - 1) // per_page if total_count is not None else None
+
+            if cursor is not None:
+                select = f"""
+                    SELECT articles.id, articles.source, articles.title, articles.url,
+                           articles.published, articles.scraped_at, articles.AI_tag as Category
+                    FROM articles {article_filter.join}
+                """
+                conditions = cursor_conditions(cursor_published, cursor_id) if cursor else [(None, [])]
+                # Fetch one extra row to find out whether there is a next page
+                rows = fetch_keyset_rows(
+                    conn, select, article_filter.where, list(article_filter.params),
+                    article_filter.order_by, conditions, per_page + 1
+                )
+
+                articles = rows[:per_page]
+                payload = {
+                    "articles": [dict(row) for row in articles],
+                    "total": total_count,
+                    "total_is_estimate": total_is_estimate,
+                    "per_page": per_page,
+                    "total_pages": total_pages,
+                    "next_cursor": encode_cursor(articles[-1]) if len(rows) > per_page else None
+                }
+            else:
+                offset = (page - 1) * per_page
+                query = f"""
+                    SELECT articles.id, articles.source, articles.title, articles.url,
+                           articles.published, articles.scraped_at, articles.AI_tag as Category
+                    {from_where}
+                    ORDER BY {article_filter.order_by}
+                    LIMIT ? OFFSET ?
+                """
+                articles = conn.execute(query, article_filter.params + [per_page, offset]).fetchall()
+
+                if total_count is not None and not total_is_estimate:
+                    has_next_page = offset + per_page < total_count
+                else:
+                    has_next_page = len(articles) == per_page
+                payload = {
+                    "articles": [dict(row) for row in articles],
+                    "total": total_count,
+                    "total_is_estimate": total_is_estimate,
+                    "page": page,
+                    "per_page": per_page,
+                    "total_pages": total_pages,
+                    # Lets a client switch from page numbers to keyset paging mid-way
+                    "next_cursor": encode_cursor(articles[-1]) if articles and has_next_page and sort != 'relevance' else None
+                }
+
+        return jsonify(payload)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Bulk export of a filtered article query. Rows are streamed from the SQLite
+# cursor in batches, so memory stays flat however many rows match; the pooled
+# connection is held until the stream ends or the client goes away.
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+EXPORT_COLUMNS = ('id', 'source', 'title', 'url', 'published', 'scraped_at', 'Category')
+
+def stream_export(country, export_format, limit, **filters):
+    """Yield the export body in chunks, after a first None once the query has run.
+
+    Priming the generator up to that None lets the caller turn filter and
+    query errors into a normal JSON error response.
+    """
+    with db_connection(country) as conn:
+        article_filter = build_article_filter(conn, **filters)
         query = f"""
-            SELECT id, source, title, url, published, scraped_at, AI_tag as Category
-            FROM articles 
-            WHERE (? = '' OR LOWER(title) LIKE LOWER(?))
-            AND (? = '' OR source = ?)
-            AND (? = '' OR AI_tag = ?)
-            {time_condition}
-            ORDER BY published DESC
-            LIMIT ? OFFSET ?
+            SELECT articles.id, articles.source, articles.title, articles.url,
+                   articles.published, articles.scraped_at, articles.AI_tag as Category
+            FROM articles {article_filter.join}
+            {article_filter.where}
+            ORDER BY {article_filter.order_by}
+            LIMIT ?
         """
-        
-        query_params = [
-            search_query, search_pattern,
-            source, source,
-            category, category
-        ] + time_params + [per_page, offset]
-        
-        articles = conn.execute(query, query_params).fetchall()
-        conn.close()
-        
+        # LIMIT -1 means no limit in SQLite
+        cursor = conn.execute(query, article_filter.params + [limit if limit is not None else -1])
+        try:
+            yield None
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if export_format == 'csv':
+                # The header goes out even when nothing matches
+                yield ','.join(EXPORT_COLUMNS) + '\r\n'
+            while True:
+                rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                if export_format == 'csv':
+                    writer.writerows(tuple(row) for row in rows)
+                    chunk = buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                else:
+                    chunk = ''.join(json.dumps(dict(row), ensure_ascii=False) + '\n' for row in rows)
+                yield chunk
+        finally:
+            cursor.close()
+
+@app.route("/api/articles/<country>/export", methods=["GET"])
+def export_articles(country):
+    try:
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+        limit = request.args.get('limit')
+        try:
+            limit = int(limit) if limit else None
+            time_filter = request.args.get('time', '')
+            if time_filter:
+                int(time_filter)
+        except ValueError:
+            return jsonify({"error": "limit and time must be integers"}), 400
+
+        body = stream_export(
+            country, export_format, limit,
+            search_query=request.args.get('search', ''),
+            source=request.args.get('source', ''),
+            category=request.args.get('category', ''),
+            time_filter=time_filter,
+            sort=request.args.get('sort', 'recent')
+        )
+        try:
+            next(body)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        filename = f"articles-{country.lower()}-{datetime.now():%Y%m%d-%H%M}.{export_format}"
+        return Response(
+            stream_with_context(body),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={
+                'Content-Disposition': f'attachment; filename="{filename}"',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def federated_cursor_conditions(country_code, cursor):
+    """Keyset predicates for one country under the (published, country, id) order.
+
+    As with cursor_conditions(), undated rows come after every dated one and
+    get a part of their own.
+    """
+    cursor_published, cursor_country, cursor_id = cursor
+    if country_code == cursor_country:
+        return cursor_conditions(cursor_published, cursor_id)
+    if cursor_published is None:
+        # Past the dated rows: only the undated rows of later countries are left
+        return [("articles.published IS NULL", [])] if country_code < cursor_country else []
+    if country_code < cursor_country:
+        dated = ("articles.published <= ?", [cursor_published])
+    else:
+        dated = ("articles.published < ?", [cursor_published])
+    return [dated, ("articles.published IS NULL", [])]
+
+def query_country_page(country_code, filters, cursor, limit, count_mode):
+    with db_connection(country_code) as conn:
+        article_filter = build_article_filter(conn, **filters)
+        total, total_is_estimate = None, False
+        if count_mode != 'none':
+            total, total_is_estimate = count_articles(
+                conn, country_code, article_filter.cache_key,
+                f"FROM articles {article_filter.join} {article_filter.where}",
+                article_filter.params, count_mode
+            )
+        select = f"""
+            SELECT articles.id, articles.source, articles.title, articles.url,
+                   articles.published, articles.scraped_at, articles.AI_tag as Category
+            FROM articles {article_filter.join}
+        """
+        rows = fetch_keyset_rows(
+            conn, select, article_filter.where, list(article_filter.params),
+            "articles.published DESC, articles.id DESC",
+            federated_cursor_conditions(country_code, cursor) if cursor else [(None, [])],
+            limit
+        )
+    return total, total_is_estimate, [{**dict(row), 'country': country_code} for row in rows]
+
+def federated_sort_key(row):
+    return (row['published'] or '', row['country'], row['id'])
+
+# Search across every country database. Each database returns at most one page
+# in (published, id) order, the pages are k-way merged by published, and the
+# cursor carries (published, country, id) so the next page resumes every
+# database at the right spot.
+@app.route("/api/articles/all", methods=["GET"])
+def get_all_articles():
+    try:
+        filters = {
+            'search_query': request.args.get('search', ''),
+            'source': request.args.get('source', ''),
+            'category': request.args.get('category', ''),
+            'time_filter': request.args.get('time', '')
+        }
+        per_page = int(request.args.get('per_page', 10))
+        count_mode = request.args.get('count', 'exact')
+        if count_mode not in ('exact', 'estimate', 'none'):
+            return jsonify({"error": "count must be one of exact, estimate, none"}), 400
+        countries = [code.strip().lower() for code in request.args.get('countries', '').split(',') if code.strip()]
+        countries = countries or list(DATABASES.keys())
+        unsupported = [code for code in countries if code not in DATABASES]
+        if unsupported:
+            return jsonify({"error": f"Unsupported country code: {', '.join(unsupported)}"}), 400
+
+        cursor = None
+        if request.args.get('cursor'):
+            try:
+                cursor = decode_federated_cursor(request.args['cursor'])
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+
+        executor = get_db_executor()
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run,
+                query_country_page, code, filters, cursor, per_page + 1, count_mode
+            )
+            for code in countries
+        ]
+        results = [future.result() for future in futures]
+
+        merged = heapq.merge(*(rows for _, _, rows in results), key=federated_sort_key, reverse=True)
+        page = []
+        for row in merged:
+            page.append(row)
+            if len(page) > per_page:
+                break
+
+        totals = [total for total, _, _ in results]
+        total_count = sum(totals) if count_mode != 'none' else None
+        articles = page[:per_page]
         return jsonify({
-            "articles": [dict(row) for row in articles],
+            "articles": articles,
             "total": total_count,
-            "page": page,
+            # Approximate as soon as any one country's count is
+            "total_is_estimate": any(is_estimate for _, is_estimate, _ in results),
+            "totals": dict(zip(countries, totals)) if count_mode != 'none' else None,
             "per_page": per_page,
-            "total_pages": (total_count + per_page - 1) // per_page
+            "total_pages": (total_count + per_page - 1) // per_page if total_count is not None else None,
+            "next_cursor": encode_federated_cursor(articles[-1]) if len(page) > per_page else None
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -127,68 +2731,48 @@ def get_articles(country):
 @app.route("/api/sources/<country>", methods=["GET"])
 def get_sources(country):
     try:
-        conn = get_db_connection(country)
-        sources = conn.execute("SELECT DISTINCT source FROM articles").fetchall()
-        conn.close()
-        return jsonify([dict(row)["source"] for row in sources])
+        sources, etag = get_facet(country, 'sources', "SELECT DISTINCT source FROM articles")
+        return facet_response(sources, etag)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route("/api/categories/<country>", methods=["GET"])
 def get_categories(country):
     try:
-        conn = get_db_connection(country)
-        categories = conn.execute("SELECT DISTINCT AI_tag as Category FROM articles WHERE AI_tag IS NOT NULL ORDER BY AI_tag").fetchall()
-        conn.close()
-        return jsonify([dict(row)["Category"] for row in categories])
+        categories, etag = get_facet(country, 'categories', "SELECT DISTINCT AI_tag as Category FROM articles WHERE AI_tag IS NOT NULL ORDER BY AI_tag")
+        return facet_response(categories, etag)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def build_preview(content):
+    if content['description'] is not None:
+        description = content['description']
+    else:
+        description = content['first_paragraph']
+    return {
+        'description': description[:300] + '...' if len(description) > 300 else description,
+        'favicon': content['favicon'],
+        'image': content['image'],
+        'published_date': content['published_date']
+    }
+
 @app.route("/api/article-preview/<country>/<int:article_id>", methods=["GET"])
 def get_article_preview(country, article_id):
     try:
-        conn = get_db_connection(country)
         query = """
             SELECT title, url, published, source, AI_tag as Category
             FROM articles 
             WHERE id = ?
         """
-        article = conn.execute(query, (article_id,)).fetchone()
-        conn.close()
+        with db_connection(country) as conn:
+            article = conn.execute(query, (article_id,)).fetchone()
         
         if article:
             try:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                    'Accept-Charset': 'utf-8'
-                }
-                response = requests.get(article['url'], headers=headers, timeout=5)
-                response.encoding = response.apparent_encoding or 'utf-8'
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                meta_desc = soup.find('meta', {'name': 'description'})
-                if meta_desc:
-                    description = meta_desc.get('content', '')
-                else:
-                    first_p = soup.find('p')
-                    description = first_p.text if first_p else ''
-                
-                favicon = soup.find('link', {'rel': 'icon'}) or soup.find('link', {'rel': 'shortcut icon'})
-                favicon_url = favicon['href'] if favicon else None
-                if favicon_url and not favicon_url.startswith(('http://', 'https://')):
-                    parsed_url = urlparse(article['url'])
-                    favicon_url = f"{parsed_url.scheme}://{parsed_url.netloc}{favicon_url}"
-                
-                main_image = soup.find('meta', {'property': 'og:image'})
-                image_url = main_image['content'] if main_image else None
-                
+                content = fetch_article_preview(article['url'], timeout=5)
                 return jsonify({
                     **dict(article),
-                    'preview': {
-                        'description': description[:300] + '...' if len(description) > 300 else description,
-                        'favicon': favicon_url,
-                        'image': image_url
-                    }
+                    'preview': build_preview(content)
                 })
             except Exception as e:
                 return jsonify(dict(article))
@@ -197,6 +2781,76 @@ def get_article_preview(country, article_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Previews for a whole result page in one round trip: one IN (...) query, the
+# publisher fetches run concurrently, and whatever misses the deadline comes
+# back without a preview and is listed in `incomplete`.
+PREVIEW_BATCH_MAX_IDS = int(os.getenv('PREVIEW_BATCH_MAX_IDS', 50))
+PREVIEW_BATCH_DEADLINE = float(os.getenv('PREVIEW_BATCH_DEADLINE', 5))
+
+@app.route("/api/article-previews/<country>", methods=["GET"])
+def get_article_previews(country):
+    try:
+        try:
+            article_ids = [int(value) for value in request.args.get('ids', '').split(',') if value.strip()]
+        except ValueError:
+            return jsonify({"error": "ids must be a comma-separated list of article ids"}), 400
+        if not article_ids:
+            return jsonify({"error": "At least one article id is required"}), 400
+        if len(article_ids) > PREVIEW_BATCH_MAX_IDS:
+            return jsonify({"error": f"At most {PREVIEW_BATCH_MAX_IDS} ids per request"}), 400
+
+        query = f"""
+            SELECT id, title, url, published, source, AI_tag as Category
+            FROM articles
+            WHERE id IN ({', '.join('?' for _ in article_ids)})
+        """
+        with db_connection(country) as conn:
+            rows = {row['id']: dict(row) for row in conn.execute(query, article_ids)}
+
+        previews, _ = fetch_many(
+            [row['url'] for row in rows.values()],
+            timeout=5,
+            deadline=PREVIEW_BATCH_DEADLINE,
+            fetch_function=fetch_article_preview
+        )
+
+        articles = []
+        incomplete = []
+        for article_id in dict.fromkeys(article_ids):
+            article = rows.get(article_id)
+            if article is None:
+                continue
+            if article['url'] in previews:
+                article['preview'] = build_preview(previews[article['url']])
+            else:
+                incomplete.append(article_id)
+            articles.append(article)
+
+        return jsonify({
+            "articles": articles,
+            "missing": [article_id for article_id in article_ids if article_id not in rows],
+            "incomplete": incomplete
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/summary-cache/stats", methods=["GET"])
+def get_summary_cache_stats():
+    try:
+        with summary_cache_stats_lock:
+            stats = dict(summary_cache_stats)
+        lookups = stats['hits'] + stats['misses']
+        entries = get_cache_connection().execute("SELECT COUNT(*) FROM summary_cache").fetchone()[0]
+        return jsonify({
+            **stats,
+            "hit_ratio": stats['hits'] / lookups if lookups else None,
+            "entries": entries,
+            "max_entries": SUMMARY_CACHE_MAX_ENTRIES,
+            "ttl_seconds": SUMMARY_CACHE_TTL
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/api/summarize", methods=["POST"])
 def summarize_article():
     try:
@@ -206,6 +2860,7 @@ def summarize_article():
         article = data.get('article')
         instructions = data.get('instructions', 'Please provide a concise summary of the following news article, highlighting the key points and maintaining an objective tone.')
         selected_text = data.get('selected_text', '')
+        no_cache = bool(data.get('no_cache', False))
         
         if not article:
             print("Error: No article data provided")
@@ -216,70 +2871,32 @@ def summarize_article():
             return jsonify({"error": "Article URL is required"}), 400
 
         print(f"Fetching article content from URL: {article['url']}")
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept-Charset': 'utf-8'
-        }
         
         try:
-            response = requests.get(article['url'], headers=headers, timeout=10)
-            response.encoding = response.apparent_encoding or 'utf-8'
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            article_text = ''
-            for p in soup.find_all('p'):
-                article_text += p.get_text() + '\n'
+            article_text = fetch_article_content(article['url'], timeout=10)['text']
             
             content_to_summarize = selected_text if selected_text else article_text
-            content_to_summarize = content_to_summarize[:4000]
             
             print("Article content fetched successfully, length:", len(content_to_summarize))
-            
-            prompt = f"""Title: {article['title']}
-Source: {article['source']}
-Date: {article['published']}
-
-{instructions}
-
-Content to summarize:
-{content_to_summarize}
-
-Please provide:
-1. A compelling headline in bold that captures the essence of the article (distinct from the original title)
-2. A well-structured summary that includes:
-   - Key points
-   - Main arguments
-   - STAY FACTUAL AND OBJECTIVE - avoid loaded language and only summarise the facts reported in original article
-   - ONLY use British English - avoid Americanisms and other non-British English expressions. "Z" turn to "S" and "Center" turn to "Centre", Defence instead of Defense.
-   - Keep it short and concise - maximum 200 words.
-
-Format your response as:
-HEADLINE: [Your headline here]
-SUMMARY: [Your summary here]"""
 
             print("Sending request to OpenAI API")
             try:
-                # Initialize OpenAI client with minimal configuration
-                client = openai.OpenAI(
-                    api_key=os.getenv('OPENAI_API_KEY')
+                content_to_summarize = prepare_article_content(
+                    article, instructions, content_to_summarize, no_cache
                 )
-                
-                response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a professional news analyst providing concise, objective summaries of news articles."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.2,
-                    max_tokens=500
+                with timed('prompt'):
+                    prompt = build_article_prompt(article, instructions, content_to_summarize)
+
+                summary, cached = complete_summary(
+                    ARTICLE_SYSTEM_PROMPT, prompt, instructions,
+                    max_tokens=500, no_cache=no_cache
                 )
-                
-                summary = response.choices[0].message.content
-                print("Successfully generated summary")
+                print("Successfully generated summary" + (" (cached)" if cached else ""))
                 
                 return jsonify({
                     "summary": summary,
-                    "article": article
+                    "article": article,
+                    "cached": cached
                 })
             except Exception as e:
                 print(f"OpenAI API Error: {str(e)}")
@@ -315,89 +2932,297 @@ def summarize_merged_articles():
         articles = data.get('articles', [])
         instructions = data.get('instructions', 'Please provide a comprehensive summary of the following news articles, highlighting the key points and maintaining an objective tone.')
         selected_text = data.get('selected_text', '')
+        no_cache = bool(data.get('no_cache', False))
         
         if not articles or len(articles) == 0:
             return jsonify({"error": "At least one article is required"}), 400
 
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept-Charset': 'utf-8'
-        }
+        # Selected text replaces every article's content, so nothing to fetch
+        if selected_text:
+            fetched, fetch_errors = {}, {}
+        else:
+            fetched, fetch_errors = fetch_many([article['url'] for article in articles], timeout=10)
+
+        article_contents, failed_articles = collect_merged_contents(
+            articles, selected_text, fetched, fetch_errors
+        )
+
+        if not article_contents:
+            return jsonify({
+                "error": "Failed to fetch any article contents",
+                "failed_articles": failed_articles
+            }), 400
+
+        article_contents = prepare_merged_contents(article_contents, instructions, no_cache)
+        with timed('prompt'):
+            prompt = build_merged_prompt(instructions, article_contents)
+
+        summary, cached = complete_summary(
+            MERGED_SYSTEM_PROMPT, prompt, instructions,
+            max_tokens=2000, no_cache=no_cache
+        )
         
-        article_contents = []
-        for article in articles:
-            try:
-                response = requests.get(article['url'], headers=headers, timeout=10)
-                response.encoding = response.apparent_encoding or 'utf-8'
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                article_text = ''
-                for p in soup.find_all('p'):
-                    article_text += p.get_text() + '\n'
-                
-                content_to_summarize = selected_text if selected_text else article_text
-                content_to_summarize = content_to_summarize[:2000]
-                article_contents.append({
-                    'title': article['title'],
-                    'source': article['source'],
-                    'date': article['published'],
-                    'content': content_to_summarize
+        return jsonify({
+            "summary": summary,
+            "articles": articles,
+            "failed_articles": failed_articles,
+            "cached": cached
+        })
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Streaming variants of the summarize endpoints. They take the same JSON body and
+# answer with Server-Sent Events: `progress` while articles are fetched, `token`
+# for each piece of the summary, then `done` with the full summary, or `error`.
+@app.route("/api/summarize/stream", methods=["POST"])
+def summarize_article_stream():
+    data = request.json or {}
+    article = data.get('article')
+    instructions = data.get('instructions', 'Please provide a concise summary of the following news article, highlighting the key points and maintaining an objective tone.')
+    selected_text = data.get('selected_text', '')
+    no_cache = bool(data.get('no_cache', False))
+
+    if not article:
+        return jsonify({"error": "Article data is required"}), 400
+    if not article.get('url'):
+        return jsonify({"error": "Article URL is required"}), 400
+
+    def events():
+        try:
+            if selected_text:
+                content_to_summarize = selected_text
+            else:
+                yield sse_event('progress', {'stage': 'fetching', 'url': article['url']})
+                content_to_summarize = fetch_article_content(article['url'], timeout=10)['text']
+                yield sse_event('progress', {'stage': 'fetched', 'url': article['url']})
+            if estimate_tokens(content_to_summarize) > SUMMARY_ARTICLE_TOKENS:
+                yield sse_event('progress', {'stage': 'condensing'})
+            content_to_summarize = prepare_article_content(
+                article, instructions, content_to_summarize, no_cache
+            )
+            prompt = build_article_prompt(article, instructions, content_to_summarize)
+            yield from stream_summary_events(
+                ARTICLE_SYSTEM_PROMPT, prompt, instructions, 500, no_cache,
+                {'article': article}
+            )
+        except Exception as e:
+            print(f"Error in summarize_article_stream: {str(e)}")
+            yield sse_event('error', {'error': str(e), 'error_type': str(type(e))})
+
+    return sse_response(events())
+
+@app.route("/api/summarize-merged/stream", methods=["POST"])
+def summarize_merged_articles_stream():
+    data = request.json or {}
+    articles = data.get('articles', [])
+    instructions = data.get('instructions', 'Please provide a comprehensive summary of the following news articles, highlighting the key points and maintaining an objective tone.')
+    selected_text = data.get('selected_text', '')
+    no_cache = bool(data.get('no_cache', False))
+
+    if not articles:
+        return jsonify({"error": "At least one article is required"}), 400
+
+    def events():
+        try:
+            fetched, fetch_errors = {}, {}
+            if not selected_text:
+                urls = [article['url'] for article in articles]
+                yield sse_event('progress', {'stage': 'fetching', 'total': len(urls)})
+                for url, content, error in iter_fetches(urls, timeout=10):
+                    if error is None:
+                        fetched[url] = content
+                        yield sse_event('progress', {'stage': 'fetched', 'url': url})
+                    else:
+                        fetch_errors[url] = error
+                        yield sse_event('progress', {'stage': 'failed', 'url': url, 'error': error})
+
+            article_contents, failed_articles = collect_merged_contents(
+                articles, selected_text, fetched, fetch_errors
+            )
+            if not article_contents:
+                yield sse_event('error', {
+                    'error': "Failed to fetch any article contents",
+                    'failed_articles': failed_articles
                 })
-            except Exception as e:
-                print(f"Error fetching article {article['url']}: {str(e)}")
-                continue
+                return
 
-        if not article_contents:
-            return jsonify({"error": "Failed to fetch any article contents"}), 400
+            if sum(estimate_tokens(article['content']) for article in article_contents) > SUMMARY_MERGED_TOKENS:
+                yield sse_event('progress', {'stage': 'condensing'})
+            article_contents = prepare_merged_contents(article_contents, instructions, no_cache)
+            prompt = build_merged_prompt(instructions, article_contents)
+            yield from stream_summary_events(
+                MERGED_SYSTEM_PROMPT, prompt, instructions, 2000, no_cache,
+                {'articles': articles, 'failed_articles': failed_articles}
+            )
+        except Exception as e:
+            print(f"Error in summarize_merged_articles_stream: {str(e)}")
+            yield sse_event('error', {'error': str(e), 'error_type': str(type(e))})
 
-        articles_text = "\n\n".join([
-            f"""Article {i+1}:
-Title: {article['title']}
-Source: {article['source']}
-Date: {article['date']}
-Content: {article['content']}"""
-            for i, article in enumerate(article_contents)
-        ])
+    return sse_response(events())
 
-        prompt = f"""{instructions}
+@app.route("/api/summary-jobs", methods=["POST"])
+def create_summary_job_endpoint():
+    try:
+        data = request.json or {}
+        country = data.get('country', '')
+        article_ids = data.get('article_ids') or []
+        instructions = data.get('instructions', 'Please provide a concise summary of the following news article, highlighting the key points and maintaining an objective tone.')
+        no_cache = bool(data.get('no_cache', False))
 
-{articles_text}
+        if not article_ids:
+            return jsonify({"error": "At least one article id is required"}), 400
+        if len(article_ids) > SUMMARY_JOB_MAX_ARTICLES:
+            return jsonify({"error": f"At most {SUMMARY_JOB_MAX_ARTICLES} articles per job"}), 400
+        try:
+            article_ids = [int(article_id) for article_id in article_ids]
+        except (TypeError, ValueError):
+            return jsonify({"error": "article_ids must be a list of article ids"}), 400
 
-Please provide:
-1. A compelling headline in bold that captures the essence of the combined articles (distinct from the original titles)
-2. A comprehensive summary that includes:
-   - Key points from all articles
-   - Main arguments and their connections
-   - STAY FACTUAL AND OBJECTIVE - avoid loaded language and only summarise the facts reported in original articles
-   - ONLY use British English - avoid Americanisms and other non-British English expressions. "Z" turn to "S" and "Center" turn to "Centre", Defence instead of Defense.
-   - Keep it concise but comprehensive - maximum 400 words.
-   - Highlight any patterns, connections, or contradictions between the articles.
+        query = f"""
+            SELECT id, title, url, published, source, AI_tag as Category
+            FROM articles
+            WHERE id IN ({', '.join('?' for _ in article_ids)})
+        """
+        try:
+            with db_connection(country) as conn:
+                rows = {row['id']: dict(row) for row in conn.execute(query, article_ids)}
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-Format your response as:
-HEADLINE: [Your headline here]
-SUMMARY: [Your summary here]"""
+        articles = [rows[article_id] for article_id in dict.fromkeys(article_ids) if article_id in rows]
+        if not articles:
+            return jsonify({"error": "None of the articles were found"}), 404
 
-        client = openai.OpenAI()
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a professional news analyst providing comprehensive, objective summaries of multiple related news articles."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=2000
-        )
-        
-        summary = response.choices[0].message.content
-        
+        job_id = create_summary_job(country.lower(), articles, instructions, no_cache)
         return jsonify({
-            "summary": summary,
-            "articles": articles
+            "job_id": job_id,
+            "total": len(articles),
+            "missing": [article_id for article_id in article_ids if article_id not in rows],
+            "status_url": f"/api/summary-jobs/{job_id}",
+            "events_url": f"/api/summary-jobs/{job_id}/events"
+        }), 202
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/summary-jobs/<job_id>", methods=["GET"])
+def get_summary_job(job_id):
+    try:
+        job = load_summary_job(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Progress as Server-Sent Events: `item` whenever an item changes state,
+# `progress` with the counts, and `done` with the whole job once it finishes.
+# Each stream holds a server thread, so after SUMMARY_JOB_STREAM_MAX_SECONDS it
+# ends with `reconnect`; the client opens a new stream (which replays every
+# item) or polls GET /api/summary-jobs/<id> instead.
+SUMMARY_JOB_STREAM_MAX_SECONDS = float(os.getenv('SUMMARY_JOB_STREAM_MAX_SECONDS', 300))
+
+@app.route("/api/summary-jobs/<job_id>/events", methods=["GET"])
+def stream_summary_job(job_id):
+    if load_summary_job(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    def events():
+        sent = {}
+        last_counts = None
+        last_event_at = time.monotonic()
+        expires_at = time.monotonic() + SUMMARY_JOB_STREAM_MAX_SECONDS
+        try:
+            while True:
+                job = load_summary_job(job_id)
+                for item in job['items']:
+                    state = (item['status'], item['attempts'])
+                    if sent.get(item['position']) != state:
+                        sent[item['position']] = state
+                        last_event_at = time.monotonic()
+                        yield sse_event('item', item)
+                if job['counts'] != last_counts:
+                    last_counts = job['counts']
+                    last_event_at = time.monotonic()
+                    yield sse_event('progress', {'status': job['status'], 'total': job['total'], 'counts': job['counts']})
+                if job['status'] == 'finished':
+                    yield sse_event('done', job)
+                    return
+                if time.monotonic() >= expires_at:
+                    yield sse_event('reconnect', {
+                        'status': job['status'],
+                        'status_url': f"/api/summary-jobs/{job_id}"
+                    })
+                    return
+                if time.monotonic() - last_event_at > 15:
+                    # Comment line so proxies don't close an idle stream
+                    last_event_at = time.monotonic()
+                    yield ": keepalive\n\n"
+                time.sleep(SUMMARY_JOB_POLL_INTERVAL)
+        except Exception as e:
+            print(f"Error in stream_summary_job: {str(e)}")
+            yield sse_event('error', {'error': str(e), 'error_type': str(type(e))})
+
+    return sse_response(events())
+
+# Admin endpoints. When ADMIN_TOKEN is set they require it as a bearer token.
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+def admin_authorized():
+    if not ADMIN_TOKEN:
+        return True
+    return hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {ADMIN_TOKEN}")
+
+@app.route("/api/admin/fetch-breakers", methods=["GET"])
+def get_fetch_breakers():
+    if not admin_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    try:
+        domains = []
+        with domain_health_lock:
+            for domain, health in sorted(domain_health.items()):
+                p50 = health.percentile(0.5)
+                p95 = health.percentile(FETCH_TIMEOUT_PERCENTILE)
+                domains.append({
+                    'domain': domain,
+                    'state': health.state,
+                    'successes': health.successes,
+                    'failures': health.failures,
+                    'consecutive_failures': health.consecutive_failures,
+                    'last_error': health.last_error,
+                    'opened_at': datetime.fromtimestamp(health.opened_at).isoformat() if health.opened_at else None,
+                    'samples': len(health.latencies),
+                    'latency_p50_ms': round(p50 * 1000, 1) if p50 is not None else None,
+                    'latency_p95_ms': round(p95 * 1000, 1) if p95 is not None else None,
+                    # What a fetch with the summarize endpoints' 10s ceiling would use
+                    'timeout_seconds': round(health.timeout(10), 2)
+                })
+        return jsonify({
+            'pid': os.getpid(),
+            'failure_threshold': BREAKER_FAILURE_THRESHOLD,
+            'open_seconds': BREAKER_OPEN_SECONDS,
+            'domains': domains
         })
-        
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    lines = [metrics.render()]
+    # Hit ratios per cache, derived from the lookup counters
+    lookups = {}
+    for labels, value in metrics.counter_values('mundus_cache_requests_total').items():
+        labels = dict(labels)
+        hits, total = lookups.get(labels['cache'], (0, 0))
+        lookups[labels['cache']] = (hits + (value if labels['result'] == 'hit' else 0), total + value)
+    if lookups:
+        lines.append("# HELP mundus_cache_hit_ratio Share of cache lookups that were hits.")
+        lines.append("# TYPE mundus_cache_hit_ratio gauge")
+        for cache, (hits, total) in sorted(lookups.items()):
+            lines.append(f'mundus_cache_hit_ratio{{cache="{cache}"}} {hits / total}')
+        lines.append('')
+    return Response('\n'.join(lines), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port) 
\ No newline at end of file
@@ -0,0 +1,138 @@
+"""Show how the article list holds up while summaries are in flight.
+
+Starts the backend under gunicorn with the given worker class, keeps a number
+of slow summarize requests running against the OpenAI stub, and meanwhile
+measures the latency of /api/articles. With sync workers the list queues
+behind the summaries; with gthread workers it should stay flat.
+
+    python backend/benchmarks/bench_concurrency.py --worker-class sync gthread
+"""
+import argparse
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+from synthetic import OpenAIStub, PublisherStub, create_database  # noqa: E402
+
+DATABASE_FILES = ['swedish_news_URLs.db', 'polish_news_URLs.db', 'finnish_news_URLs.db', 'danish_news_URLs.db']
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"{url}/health", timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError("Backend did not start")
+
+
+def keep_summarizing(api_url, publisher_url, stop_event):
+    session = requests.Session()
+    while not stop_event.is_set():
+        article_id = random.randrange(1000000)
+        article = {
+            'id': article_id,
+            'title': 'Synthetic article',
+            'source': 'source1',
+            'published': '2025-01-01T00:00:00',
+            'url': f"{publisher_url}/article/{article_id}"
+        }
+        try:
+            session.post(f"{api_url}/api/summarize", json={'article': article, 'no_cache': True}, timeout=120)
+        except requests.RequestException:
+            pass
+
+
+def measure(worker_class, args, workdir, publisher, openai_stub):
+    port = free_port()
+    api_url = f"http://127.0.0.1:{port}"
+    env = dict(
+        os.environ,
+        OPENAI_BASE_URL=f"{openai_stub.url}/v1",
+        OPENAI_API_KEY='benchmark',
+        CACHE_DB_PATH=os.path.join(workdir, f'cache_{worker_class}.db'),
+        FLASK_ENV='production',
+        PORT=str(port),
+        GUNICORN_WORKER_CLASS=worker_class,
+        WEB_CONCURRENCY=str(args.workers),
+        # gunicorn quietly upgrades sync workers to gthread when threads > 1
+        GUNICORN_THREADS=str(1 if worker_class == 'sync' else args.threads),
+    )
+    server = subprocess.Popen(
+        ['gunicorn', '-c', os.path.join(REPO_ROOT, 'gunicorn.conf.py'),
+         '--pythonpath', REPO_ROOT, 'backend.backend:app'],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    stop_event = threading.Event()
+    try:
+        wait_until_up(api_url)
+        session = requests.Session()
+
+        def list_latencies(count):
+            latencies = []
+            for _ in range(count):
+                start = time.perf_counter()
+                session.get(f"{api_url}/api/articles/swe?page={random.randint(1, 50)}", timeout=120)
+                latencies.append((time.perf_counter() - start) * 1000)
+            return sorted(latencies)
+
+        idle = list_latencies(args.samples)
+        summarizers = [
+            threading.Thread(target=keep_summarizing, args=(api_url, publisher.url, stop_event), daemon=True)
+            for _ in range(args.summaries)
+        ]
+        for thread in summarizers:
+            thread.start()
+        time.sleep(1)
+        busy = list_latencies(args.samples)
+    finally:
+        stop_event.set()
+        server.kill()
+        server.wait()
+
+    for label, latencies in (('idle', idle), (f'{args.summaries} summaries in flight', busy)):
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        print(f"{worker_class:8} list latency, {label:26} median {statistics.median(latencies):8.1f} ms  p95 {p95:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--worker-class', nargs='+', default=['sync', 'gthread'])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--summaries', type=int, default=4, help='Concurrent summarize requests kept in flight.')
+    parser.add_argument('--samples', type=int, default=20, help='List requests measured per phase.')
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--openai-latency', type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir, \
+            PublisherStub(latency=0.2) as publisher, \
+            OpenAIStub(latency=args.openai_latency) as openai_stub:
+        for file_name in DATABASE_FILES:
+            create_database(os.path.join(workdir, file_name), args.rows, url_base=publisher.url)
+        for worker_class in args.worker_class:
+            measure(worker_class, args, workdir, publisher, openai_stub)
+
+
+if __name__ == '__main__':
+    main()
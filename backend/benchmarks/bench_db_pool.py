@@ -0,0 +1,78 @@
+"""Compare the per-request SQLite cost of a fresh connection against the pool.
+
+Builds a synthetic country database and runs the article list queries the way
+a request does, once opening and closing a connection per request (the old
+get_db_connection() path) and once through db_connection().
+
+    python backend/benchmarks/bench_db_pool.py --rows 200000 --requests 2000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import backend  # noqa: E402
+from synthetic import create_database  # noqa: E402
+
+LIST_QUERY = """
+    SELECT id, source, title, url, published, scraped_at, AI_tag as Category
+    FROM articles
+    WHERE source = ?
+    ORDER BY published DESC, id DESC
+    LIMIT 10
+"""
+COUNT_QUERY = "SELECT COUNT(*) as total FROM articles WHERE source = ?"
+
+
+def run_request(conn):
+    source = f"source{random.randrange(40)}"
+    conn.execute(COUNT_QUERY, (source,)).fetchone()
+    conn.execute(LIST_QUERY, (source,)).fetchall()
+
+
+def bench_fresh(requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        conn = backend.get_db_connection('swe')
+        run_request(conn)
+        conn.close()
+    return time.perf_counter() - start
+
+
+def bench_pooled(requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        with backend.db_connection('swe') as conn:
+            run_request(conn)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'swedish_news_URLs.db')
+        print(f"Generating {args.rows} articles...")
+        create_database(db_path, args.rows)
+        backend.DATABASES['swe'] = db_path
+        backend.migrate_database('swe')
+
+        # Warm the OS page cache so both runs start from the same place
+        bench_fresh(10)
+        bench_pooled(10)
+
+        fresh = bench_fresh(args.requests)
+        pooled = bench_pooled(args.requests)
+        print(f"fresh connection: {fresh / args.requests * 1000:.3f} ms/request")
+        print(f"pooled connection: {pooled / args.requests * 1000:.3f} ms/request")
+        print(f"speedup: {fresh / pooled:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
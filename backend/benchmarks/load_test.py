@@ -0,0 +1,217 @@
+"""Load test for the backend against synthetic data and local stub servers.
+
+For each database size it generates the four country databases, starts a
+publisher stub, an OpenAI-compatible stub and the Flask app on local ports,
+then drives every endpoint scenario with concurrent clients and records
+p50/p95/p99 latency and throughput. Results are written as JSON tagged with
+the current commit so runs can be compared:
+
+    python backend/benchmarks/load_test.py --rows 10000 100000 --output before.json
+    python backend/benchmarks/load_test.py --rows 10000 100000 --output after.json --compare before.json
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+from synthetic import OpenAIStub, PublisherStub, create_database  # noqa: E402
+
+SCENARIOS = ['list', 'search', 'time_filter', 'deep_page', 'cursor_page', 'preview', 'summarize', 'merge']
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def build_request(scenario, api_url, rows, state):
+    """Return (method, url, json_body) for one request of a scenario."""
+    country = random.choice(['swe', 'pol', 'fin', 'den'])
+    article = {
+        'id': random.randrange(1, rows + 1),
+        'title': 'Synthetic article',
+        'source': 'source1',
+        'published': datetime.now().isoformat(),
+    }
+    article['url'] = f"{state['publisher_url']}/article/{article['id']}"
+    if scenario == 'list':
+        return 'GET', f"{api_url}/api/articles/{country}", None
+    if scenario == 'search':
+        return 'GET', f"{api_url}/api/articles/{country}?search={random.choice(['malmo', 'lodz', 'budget', 'election'])}", None
+    if scenario == 'time_filter':
+        return 'GET', f"{api_url}/api/articles/{country}?time=24&source=source{random.randrange(40)}", None
+    if scenario == 'deep_page':
+        page = max(1, rows // 10 - random.randrange(100))
+        return 'GET', f"{api_url}/api/articles/{country}?page={page}", None
+    if scenario == 'cursor_page':
+        cursor = state['deep_cursors'].get(country, '')
+        return 'GET', f"{api_url}/api/articles/{country}?cursor={cursor}", None
+    if scenario == 'preview':
+        return 'GET', f"{api_url}/api/article-preview/{country}/{article['id']}", None
+    if scenario == 'summarize':
+        return 'POST', f"{api_url}/api/summarize", {'article': article, 'no_cache': True}
+    if scenario == 'merge':
+        articles = [dict(article, id=i, url=f"{state['publisher_url']}/article/{random.randrange(rows)}") for i in range(5)]
+        return 'POST', f"{api_url}/api/summarize-merged", {'articles': articles, 'no_cache': True}
+    raise ValueError(f"Unknown scenario {scenario}")
+
+
+def run_scenario(scenario, api_url, rows, state, concurrency, total_requests):
+    local = threading.local()
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one_request(_):
+        nonlocal errors
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        method, url, body = build_request(scenario, api_url, rows, state)
+        start = time.perf_counter()
+        try:
+            response = local.session.request(method, url, json=body, timeout=60)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one_request, range(total_requests)))
+    wall_time = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': total_requests,
+        'concurrency': concurrency,
+        'errors': errors,
+        'throughput_rps': total_requests / wall_time,
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def find_deep_cursors(api_url, rows):
+    """Walk to a deep page once per country so cursor_page measures a deep keyset."""
+    cursors = {}
+    for country in ['swe', 'pol', 'fin', 'den']:
+        response = requests.get(f"{api_url}/api/articles/{country}?page={max(1, rows // 10 - 1)}&count=none")
+        cursors[country] = response.json().get('next_cursor') or ''
+    return cursors
+
+
+def benchmark_size(rows, args, workdir):
+    from werkzeug.serving import make_server
+
+    print(f"\n== {rows} rows per country ==")
+    with PublisherStub(latency=args.publisher_latency) as publisher, \
+            OpenAIStub(latency=args.openai_latency) as openai_stub:
+        os.environ['OPENAI_BASE_URL'] = f"{openai_stub.url}/v1"
+        os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+        os.environ['CACHE_DB_PATH'] = os.path.join(workdir, f'cache_{rows}.db')
+
+        import backend
+        backend.CACHE_DB_PATH = os.environ['CACHE_DB_PATH']
+        for country_code, file_name in list(backend.DATABASES.items()):
+            path = os.path.join(workdir, f"{rows}_{os.path.basename(file_name)}")
+            if not os.path.exists(path):
+                print(f"Generating {path}...")
+                create_database(path, rows, url_base=publisher.url)
+            backend.DATABASES[country_code] = path
+            backend.migrate_database(country_code)
+
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        server = make_server('127.0.0.1', 0, backend.app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        api_url = f"http://127.0.0.1:{server.server_port}"
+        state = {'publisher_url': publisher.url, 'deep_cursors': find_deep_cursors(api_url, rows)}
+
+        results = {}
+        try:
+            for scenario in args.scenarios:
+                total_requests = args.llm_requests if scenario in ('summarize', 'merge') else args.requests
+                results[scenario] = run_scenario(scenario, api_url, rows, state, args.concurrency, total_requests)
+                stats = results[scenario]
+                print(f"{scenario:12} p50 {stats['p50_ms']:8.1f} ms  p95 {stats['p95_ms']:8.1f} ms  "
+                      f"p99 {stats['p99_ms']:8.1f} ms  {stats['throughput_rps']:7.1f} req/s  errors {stats['errors']}")
+        finally:
+            server.shutdown()
+        return results
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=BENCHMARK_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+    print(f"\n== compared with {baseline.get('commit')} ==")
+    for rows, scenarios in results['results'].items():
+        for scenario, stats in scenarios.items():
+            old = baseline['results'].get(rows, {}).get(scenario)
+            if not old:
+                continue
+            change = (stats['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100
+            print(f"{rows:>10} {scenario:12} p95 {old['p95_ms']:8.1f} -> {stats['p95_ms']:8.1f} ms ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000],
+                        help='Database sizes to test, rows per country (10k to 10M).')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=400, help='Requests per database scenario.')
+    parser.add_argument('--llm-requests', type=int, default=40, help='Requests per summarize scenario.')
+    parser.add_argument('--publisher-latency', type=float, default=0.05)
+    parser.add_argument('--openai-latency', type=float, default=0.5)
+    parser.add_argument('--workdir', help='Keep generated databases here between runs.')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help='Earlier results file to compare against.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        results = {
+            'commit': current_commit(),
+            'timestamp': datetime.now().isoformat(),
+            'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'workdir')},
+            'results': {str(rows): benchmark_size(rows, args, workdir) for rows in args.rows}
+        }
+
+    with open(args.output, 'w') as output:
+        json.dump(results, output, indent=2)
+    print(f"\nWrote {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""Synthetic data and local stub servers shared by the benchmarks.
+
+Nothing here talks to the network: country databases are generated on disk,
+publisher pages come from PublisherStub and completions from OpenAIStub.
+"""
+import json
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = [
+    'regering', 'hallitus', 'rząd', 'regering', 'val', 'vaalit', 'wybory', 'valg',
+    'ekonomi', 'talous', 'gospodarka', 'økonomi', 'Malmö', 'Łódź', 'Jyväskylä',
+    'Helsingør', 'Göteborg', 'Kraków', 'Tampere', 'Aarhus', 'bank', 'strike',
+    'energy', 'defence', 'election', 'budget', 'climate', 'police', 'court', 'football'
+]
+CATEGORIES = ['Politics', 'Economy', 'Sport', 'Culture', 'Crime', None]
+INSERT_ARTICLE = """
+    INSERT INTO articles (source, title, url, published, scraped_at, AI_tag)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+def create_database(path, rows, url_base='https://example.com', sources=40, days=90, seed=1):
+    """Create an `articles` table shaped like the scrapers' with `rows` rows."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS articles (
+            id INTEGER PRIMARY KEY,
+            source TEXT,
+            title TEXT,
+            url TEXT,
+            published TEXT,
+            scraped_at TEXT,
+            AI_tag TEXT
+        )
+    """)
+    now = datetime.now()
+    batch = []
+    for i in range(rows):
+        published = (now - timedelta(seconds=rng.randint(0, days * 24 * 60 * 60))).isoformat()
+        title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 12)))
+        batch.append((f"source{i % sources}", title, f"{url_base}/article/{i}",
+                      published, published, rng.choice(CATEGORIES)))
+        if len(batch) == 50000:
+            conn.executemany(INSERT_ARTICLE, batch)
+            batch = []
+    conn.executemany(INSERT_ARTICLE, batch)
+    conn.commit()
+    conn.close()
+
+
+def article_paragraphs(path, paragraphs=60):
+    rng = random.Random(path)
+    return [f"{' '.join(rng.choice(WORDS) for _ in range(40))}." for _ in range(paragraphs)]
+
+
+def article_html(path, paragraphs=60):
+    body = ''.join(f"<p>{paragraph}</p>\n" for paragraph in article_paragraphs(path, paragraphs))
+    return f"""<!DOCTYPE html>
+<html><head>
+<meta charset="utf-8">
+<title>Article {path}</title>
+<meta name="description" content="Synthetic article {path}">
+<meta property="og:image" content="/images{path}.jpg">
+<link rel="icon" href="/favicon.ico">
+<script>{'var tracking = 1;' * 2000}</script>
+</head><body>
+<nav><a href="/">Home</a></nav>
+<div class="cookie-banner"><p>We use cookies to improve your experience.</p></div>
+<article>{body}</article>
+<footer><p>Copyright Example Media</p></footer>
+</body></html>"""
+
+
+class StubServer:
+    """Runs a ThreadingHTTPServer on a free local port in a daemon thread."""
+
+    def __init__(self, handler):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def PublisherStub(latency=0.05, paragraphs=60):
+    """Serves the same canned article page for every path after `latency` seconds."""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            time.sleep(latency)
+            body = article_html(self.path, paragraphs).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', f'"{hash(self.path)}"')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return StubServer(Handler)
+
+
+def OpenAIStub(latency=0.5, tokens=80, token_delay=0.01):
+    """A minimal OpenAI-compatible /v1/chat/completions, streaming or not.
+
+    Point the backend at it with OPENAI_BASE_URL=<url>/v1.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            prompt_tokens = sum(len(message['content']) for message in request['messages']) // 4
+            words = ['HEADLINE:', '**Synthetic', 'headline**\nSUMMARY:'] + ['word'] * tokens
+            time.sleep(latency)
+            if request.get('stream'):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                for word in words:
+                    self.write_chunk(self.chunk_event(request['model'], word + ' '))
+                    time.sleep(token_delay)
+                self.write_chunk(b'data: [DONE]\n\n')
+                self.wfile.write(b'0\r\n\r\n')
+                return
+
+            time.sleep(token_delay * len(words))
+            body = json.dumps({
+                'id': 'chatcmpl-stub',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': request['model'],
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': ' '.join(words)},
+                    'finish_reason': 'stop'
+                }],
+                'usage': {
+                    'prompt_tokens': prompt_tokens,
+                    'completion_tokens': len(words),
+                    'total_tokens': prompt_tokens + len(words)
+                }
+            }).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def chunk_event(self, model, text):
+            chunk = {
+                'id': 'chatcmpl-stub',
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'delta': {'content': text}, 'finish_reason': None}]
+            }
+            return f"data: {json.dumps(chunk)}\n\n".encode('utf-8')
+
+        def write_chunk(self, data):
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+            self.wfile.flush()
+
+        def log_message(self, *args):
+            pass
+
+    return StubServer(Handler)
+
+
+def write_extraction_corpus(directory, pages=200, seed=1):
+    """Write `pages` article pages as NAME.html, with their article text as NAME.txt."""
+    rng = random.Random(seed)
+    for i in range(pages):
+        path = f"/article/{i}"
+        paragraphs = article_paragraphs(path, rng.randint(5, 120))
+        with open(f"{directory}/page{i}.html", 'w', encoding='utf-8') as f:
+            f.write(article_html(path, len(paragraphs)))
+        with open(f"{directory}/page{i}.txt", 'w', encoding='utf-8') as f:
+            f.write('\n'.join(paragraphs))
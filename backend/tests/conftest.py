@@ -0,0 +1,23 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'benchmarks'))
+
+# The backend reads these at import time, so keep its stores out of the checkout
+WORKDIR = tempfile.mkdtemp(prefix='mundus-tests-')
+os.environ['CACHE_DB_PATH'] = os.path.join(WORKDIR, 'cache.db')
+os.environ['JOBS_DB_PATH'] = os.path.join(WORKDIR, 'jobs.db')
+os.environ.setdefault('OPENAI_API_KEY', 'test')
+
+import backend  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    backend.app.config['TESTING'] = True
+    return backend.app.test_client()
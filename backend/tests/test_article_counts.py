@@ -0,0 +1,98 @@
+import sqlite3
+
+import pytest
+
+import backend
+from synthetic import create_database
+
+
+@pytest.fixture
+def country_db(tmp_path, monkeypatch):
+    path = str(tmp_path / 'swedish_news_URLs.db')
+    create_database(path, 50, sources=5)
+    monkeypatch.setitem(backend.DATABASES, 'swe', path)
+    monkeypatch.setattr(backend, 'count_cache', backend.OrderedDict())
+    monkeypatch.setattr(backend, 'metrics', backend.Metrics())
+    backend.migrate_database('swe')
+    return path
+
+
+def count_lookups():
+    values = backend.metrics.counter_values('mundus_cache_requests_total')
+    return {
+        result: values.get((('cache', 'count'), ('result', result)), 0)
+        for result in ('hit', 'miss')
+    }
+
+
+def get_total(client, **query):
+    response = client.get('/api/articles/swe', query_string=query)
+    assert response.status_code == 200, response.json
+    return response.json['total'], response.json['total_is_estimate']
+
+
+def insert_article(path):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO articles (source, title, url, published, scraped_at) VALUES ('source1', 'New', 'u', '2024-05-01', '2024-05-01')"
+    )
+    conn.commit()
+    return conn
+
+
+def test_total_is_cached_per_filter(client, country_db):
+    assert get_total(client) == (50, False)
+    assert get_total(client, page=2) == (50, False)
+    assert count_lookups() == {'hit': 1, 'miss': 1}
+
+    assert get_total(client, source='source1') == (10, False)
+    assert count_lookups() == {'hit': 1, 'miss': 2}
+
+
+def test_wal_write_invalidates_the_total(client, country_db):
+    assert get_total(client, source='source1') == (10, False)
+
+    # The database is in WAL mode, so the write only changes the -wal file
+    conn = insert_article(country_db)
+    try:
+        assert get_total(client, source='source1') == (11, False)
+        assert count_lookups()['hit'] == 0
+
+        # A checkpoint moves it into the main file, which changes the token again
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        assert get_total(client, source='source1') == (11, False)
+    finally:
+        conn.close()
+
+
+def test_estimate_stops_at_the_cap(client, country_db, monkeypatch):
+    monkeypatch.setattr(backend, 'COUNT_ESTIMATE_CAP', 20)
+
+    assert get_total(client, count='estimate') == (20, True)
+    # Under the cap the count is exact, and cached like one
+    assert get_total(client, count='estimate', source='source1') == (10, False)
+    assert get_total(client, source='source1') == (10, False)
+    assert count_lookups()['hit'] == 1
+
+
+def test_estimate_serves_a_stale_total(client, country_db):
+    assert get_total(client) == (50, False)
+    conn = insert_article(country_db)
+    conn.close()
+
+    # An estimate makes do with the last exact count, flagged as such
+    assert get_total(client, count='estimate') == (50, True)
+    assert get_total(client) == (51, False)
+
+
+def test_count_none_skips_the_total(client, country_db):
+    response = client.get('/api/articles/swe', query_string={'count': 'none'})
+
+    assert response.json['total'] is None
+    assert response.json['total_pages'] is None
+    assert len(response.json['articles']) == 10
+    assert count_lookups() == {'hit': 0, 'miss': 0}
+
+
+def test_count_mode_is_validated(client, country_db):
+    assert client.get('/api/articles/swe', query_string={'count': 'maybe'}).status_code == 400
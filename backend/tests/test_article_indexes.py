@@ -0,0 +1,72 @@
+import pytest
+
+import backend
+from synthetic import create_database
+
+# The index each non-search article list filter should be read through
+EXPECTED_INDEXES = [
+    ({}, 'idx_articles_published_id'),
+    ({'source': 'source3'}, 'idx_articles_source_published'),
+    ({'category': 'Politics'}, 'idx_articles_category_published'),
+    ({'time_filter': '24'}, 'idx_articles_published_id'),
+    ({'source': 'source3', 'time_filter': '24'}, 'idx_articles_source_published'),
+    ({'category': 'Politics', 'time_filter': '24'}, 'idx_articles_category_published'),
+]
+
+
+@pytest.fixture
+def country_db(tmp_path, monkeypatch):
+    path = tmp_path / 'swedish_news_URLs.db'
+    create_database(str(path), 5000)
+    monkeypatch.setitem(backend.DATABASES, 'swe', str(path))
+    return 'swe'
+
+
+def explain(country_code, **filters):
+    conn = backend.get_db_connection(country_code)
+    try:
+        return backend.explain_article_query(conn, **filters)
+    finally:
+        conn.close()
+
+
+def test_migrate_database_creates_indexes(country_db):
+    assert backend.migrate_database(country_db) is True
+    # A second run finds the search index and leaves it alone
+    assert backend.migrate_database(country_db) is False
+
+    conn = backend.get_db_connection(country_db)
+    try:
+        indexes = {row['name'] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'articles'"
+        )}
+    finally:
+        conn.close()
+    for statement in backend.ARTICLE_INDEX_SCHEMA:
+        assert statement.split(' ON ')[0].split()[-1] in indexes
+
+
+@pytest.mark.parametrize('filters, index', EXPECTED_INDEXES)
+def test_article_list_uses_index(country_db, filters, index):
+    backend.migrate_database(country_db)
+    plan = explain(country_db, **filters)
+
+    assert any(index in step for step in plan), plan
+    assert 'SCAN articles' not in plan
+    assert not any('USE TEMP B-TREE' in step for step in plan), plan
+
+
+def test_search_uses_fts_index(country_db):
+    backend.migrate_database(country_db)
+    plan = explain(country_db, search_query='election')
+
+    assert any('articles_fts' in step for step in plan), plan
+    assert 'SCAN articles' not in plan
+
+
+def test_unmigrated_database_is_flagged(country_db):
+    # The plan the explain-articles command warns about
+    plan = explain(country_db, source='source3')
+
+    assert 'SCAN articles' in plan
+    assert any('USE TEMP B-TREE' in step for step in plan)
@@ -0,0 +1,24 @@
+import backend
+
+PAGE = """
+<html><head>
+<link rel="shortcut icon" href="/static/icon.png">
+<meta name="description" content="A test page">
+</head><body><article><p>First paragraph of the article with enough words in it.</p></article></body></html>
+"""
+
+
+def test_favicon_stored_for_successful_page():
+    url = 'https://ok.example.com/article/1'
+    content = backend.parse_article_page(PAGE, url)
+
+    assert content['favicon'] == 'https://ok.example.com/static/icon.png'
+    assert backend.get_site_favicon(url) == content['favicon']
+
+
+def test_favicon_not_stored_for_error_page():
+    url = 'https://error.example.com/article/1'
+    content = backend.parse_article_page(PAGE, url, ok=False)
+
+    assert content['favicon'] == 'https://error.example.com/static/icon.png'
+    assert backend.get_site_favicon(url) is None
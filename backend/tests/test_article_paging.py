@@ -0,0 +1,169 @@
+import sqlite3
+
+import pytest
+
+import backend
+from synthetic import create_database
+
+
+@pytest.fixture
+def country_db(tmp_path, monkeypatch):
+    path = str(tmp_path / 'swedish_news_URLs.db')
+    create_database(path, 60, sources=3)
+    conn = sqlite3.connect(path)
+    # Undated rows, and rows sharing a date so the id breaks the tie
+    conn.execute("UPDATE articles SET published = NULL WHERE id % 6 = 0")
+    conn.execute("UPDATE articles SET published = '2024-05-01T08:00:00' WHERE id % 6 = 1")
+    conn.commit()
+    conn.close()
+    monkeypatch.setitem(backend.DATABASES, 'swe', path)
+    backend.migrate_database('swe')
+    return path
+
+
+def expected_ids(path, where=''):
+    conn = sqlite3.connect(path)
+    try:
+        return [row[0] for row in conn.execute(
+            f"SELECT id FROM articles {where} ORDER BY published DESC, id DESC"
+        )]
+    finally:
+        conn.close()
+
+
+def page_through(client, **filters):
+    ids = []
+    cursor = ''
+    while cursor is not None:
+        response = client.get('/api/articles/swe', query_string={
+            **filters, 'cursor': cursor, 'count': 'none', 'per_page': 7
+        })
+        assert response.status_code == 200, response.json
+        ids += [article['id'] for article in response.json['articles']]
+        cursor = response.json['next_cursor']
+    return ids
+
+
+def test_cursor_pages_reach_undated_rows(client, country_db):
+    ids = page_through(client)
+
+    assert ids == expected_ids(country_db)
+    assert len(ids) == 60
+
+
+def test_cursor_pages_with_a_filter(client, country_db):
+    ids = page_through(client, source='source1')
+
+    assert ids == expected_ids(country_db, "WHERE source = 'source1'")
+
+
+def test_cursor_on_an_undated_row(client, country_db):
+    undated = expected_ids(country_db, 'WHERE published IS NULL')
+    cursor = backend.encode_cursor({'published': None, 'id': undated[2]})
+
+    response = client.get('/api/articles/swe', query_string={'cursor': cursor, 'count': 'none', 'per_page': 50})
+
+    assert [article['id'] for article in response.json['articles']] == undated[3:]
+    assert response.json['next_cursor'] is None
+
+
+def test_cursor_conditions_use_the_index(country_db):
+    conn = backend.get_db_connection('swe')
+    try:
+        for cursor in (('2024-05-01T08:00:00', 10), (None, 10)):
+            for condition, params in backend.cursor_conditions(*cursor):
+                plan = [row['detail'] for row in conn.execute(
+                    f"EXPLAIN QUERY PLAN SELECT articles.id, articles.title FROM articles WHERE {condition} "
+                    "ORDER BY articles.published DESC, articles.id DESC LIMIT 10",
+                    params
+                )]
+                assert any('idx_articles_published_id' in step for step in plan), plan
+                assert not any('TEMP B-TREE' in step for step in plan), plan
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def country_dbs(tmp_path, monkeypatch):
+    paths = {}
+    for seed, country_code in enumerate(('swe', 'fin', 'den')):
+        path = str(tmp_path / f"{country_code}.db")
+        create_database(path, 30 + 10 * seed, sources=3, seed=seed)
+        conn = sqlite3.connect(path)
+        conn.execute("UPDATE articles SET published = NULL WHERE id % 5 = 0")
+        # The same date in every country, so the country and id break the tie
+        conn.execute("UPDATE articles SET published = '2024-05-01T08:00:00' WHERE id % 5 = 1")
+        conn.commit()
+        conn.close()
+        monkeypatch.setitem(backend.DATABASES, country_code, path)
+        backend.migrate_database(country_code)
+        paths[country_code] = path
+    return paths
+
+
+def expected_federated(paths):
+    rows = []
+    for country_code, path in paths.items():
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        rows += [{'published': row['published'], 'country': country_code, 'id': row['id']}
+                 for row in conn.execute("SELECT id, published FROM articles")]
+        conn.close()
+    rows.sort(key=backend.federated_sort_key, reverse=True)
+    return [(row['country'], row['id']) for row in rows]
+
+
+def test_federated_pages_merge_and_resume(client, country_dbs):
+    keys = []
+    cursor = None
+    pages = 0
+    while True:
+        query = {'countries': 'swe,fin,den', 'count': 'none', 'per_page': 8}
+        if cursor:
+            query['cursor'] = cursor
+        response = client.get('/api/articles/all', query_string=query)
+        assert response.status_code == 200, response.json
+        keys += [(article['country'], article['id']) for article in response.json['articles']]
+        pages += 1
+        cursor = response.json['next_cursor']
+        if cursor is None:
+            break
+
+    assert keys == expected_federated(country_dbs)
+    assert len(keys) == 30 + 40 + 50
+    assert pages == -(-len(keys) // 8)
+
+
+def test_federated_cursor_on_an_undated_row(client, country_dbs):
+    expected = expected_federated(country_dbs)
+    # The first undated fin row: everything after it is undated
+    country_code, article_id = next(
+        key for key in expected
+        if key[0] == 'fin' and key[1] % 5 == 0
+    )
+    cursor = backend.encode_federated_cursor({'published': None, 'country': country_code, 'id': article_id})
+
+    response = client.get('/api/articles/all', query_string={
+        'countries': 'swe,fin,den', 'count': 'none', 'per_page': 100, 'cursor': cursor
+    })
+
+    keys = [(article['country'], article['id']) for article in response.json['articles']]
+    assert keys == expected[expected.index((country_code, article_id)) + 1:]
+    assert all(article['published'] is None for article in response.json['articles'])
+
+
+@pytest.mark.parametrize('count, cap, total, is_estimate', [
+    ('exact', 35, 120, False),
+    ('estimate', 100, 120, False),
+    # fin and den have more rows than the cap, so their counts stop at 35
+    ('estimate', 35, 30 + 35 + 35, True),
+])
+def test_federated_total_is_estimate(client, country_dbs, monkeypatch, count, cap, total, is_estimate):
+    monkeypatch.setattr(backend, 'count_cache', backend.OrderedDict())
+    monkeypatch.setattr(backend, 'COUNT_ESTIMATE_CAP', cap)
+
+    response = client.get('/api/articles/all', query_string={'countries': 'swe,fin,den', 'count': count})
+
+    assert response.json['total'] == total
+    assert response.json['total_is_estimate'] is is_estimate
+    assert response.json['total_pages'] == -(-total // 10)
@@ -0,0 +1,58 @@
+import backend
+
+CONTENT = {
+    'text': 'Body\n',
+    'description': 'Description',
+    'first_paragraph': 'Body',
+    'image': None,
+    'favicon': 'https://store.example.com/favicon.ico',
+    'published_date': None
+}
+
+
+def accessed_at(url):
+    return backend.get_cache_connection().execute(
+        "SELECT accessed_at FROM fetched_content WHERE url = ?", (url,)
+    ).fetchone()['accessed_at']
+
+
+def set_accessed_at(url, value):
+    conn = backend.get_cache_connection()
+    conn.execute("UPDATE fetched_content SET accessed_at = ? WHERE url = ?", (value, url))
+    conn.commit()
+
+
+def test_hits_touch_accessed_at_at_most_once_a_minute():
+    url = 'https://store.example.com/article/1'
+    backend.store_content(url, CONTENT)
+    stored_at = accessed_at(url)
+
+    assert backend.get_stored_content(url)['text'] == 'Body\n'
+    assert accessed_at(url) == stored_at
+
+    # Once the interval has passed the next hit refreshes it
+    set_accessed_at(url, stored_at - backend.CACHE_TOUCH_INTERVAL - 1)
+    backend.get_stored_content(url)
+    assert accessed_at(url) >= stored_at
+
+
+def summary_accessed_at(key):
+    return backend.get_cache_connection().execute(
+        "SELECT accessed_at FROM summary_cache WHERE key = ?", (key,)
+    ).fetchone()['accessed_at']
+
+
+def test_summary_hits_touch_accessed_at_at_most_once_a_minute():
+    key = 'test-summary-key'
+    backend.store_summary(key, 'HEADLINE: cached')
+    stored_at = summary_accessed_at(key)
+
+    assert backend.get_cached_summary(key) == 'HEADLINE: cached'
+    assert summary_accessed_at(key) == stored_at
+
+    conn = backend.get_cache_connection()
+    conn.execute("UPDATE summary_cache SET accessed_at = ? WHERE key = ?",
+                 (stored_at - backend.CACHE_TOUCH_INTERVAL - 1, key))
+    conn.commit()
+    backend.get_cached_summary(key)
+    assert summary_accessed_at(key) >= stored_at
@@ -0,0 +1,20 @@
+import pytest
+
+import backend
+
+
+@pytest.mark.skipif(backend.fcntl is None, reason='needs fcntl')
+def test_only_one_warmer_polls():
+    first, second = backend.ContentWarmer(), backend.ContentWarmer()
+    try:
+        assert first.acquire_lock()
+        # Held again on every poll
+        assert first.acquire_lock()
+        assert not second.acquire_lock()
+
+        first.release_lock()
+        assert second.acquire_lock()
+        assert not first.acquire_lock()
+    finally:
+        first.release_lock()
+        second.release_lock()
@@ -0,0 +1,88 @@
+import sqlite3
+
+import pytest
+
+import backend
+from synthetic import create_database
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    path = str(tmp_path / 'swedish_news_URLs.db')
+    create_database(path, 10)
+    monkeypatch.setitem(backend.DATABASES, 'swe', path)
+    return backend.get_db_pool('swe')
+
+
+def is_closed(conn):
+    try:
+        conn.execute("SELECT 1")
+    except sqlite3.ProgrammingError:
+        return True
+    return False
+
+
+def test_connection_is_reused(pool):
+    with backend.db_connection('swe') as conn:
+        assert conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 10
+    with backend.db_connection('swe') as again:
+        assert again is conn
+
+
+def test_connections_are_read_only(pool):
+    with pytest.raises(sqlite3.OperationalError, match='readonly'):
+        with backend.db_connection('swe') as conn:
+            conn.execute("DELETE FROM articles")
+
+
+def test_database_error_closes_the_connection(pool):
+    with pytest.raises(sqlite3.OperationalError):
+        with backend.db_connection('swe') as conn:
+            conn.execute("SELECT * FROM no_such_table")
+
+    assert is_closed(conn)
+    assert pool.connections.empty()
+    with backend.db_connection('swe') as fresh:
+        assert fresh is not conn
+
+
+def test_other_errors_return_the_connection(pool):
+    with pytest.raises(ValueError):
+        with backend.db_connection('swe') as conn:
+            raise ValueError("handler failed")
+
+    assert not is_closed(conn)
+    assert pool.connections.qsize() == 1
+
+
+def test_closing_a_stream_returns_the_connection(pool):
+    def rows():
+        with backend.db_connection('swe') as conn:
+            yield conn
+            yield None
+
+    stream = rows()
+    conn = next(stream)
+    # What happens when a client leaves a streamed response early
+    stream.close()
+
+    assert not is_closed(conn)
+    assert pool.connections.qsize() == 1
+
+
+def test_full_pool_closes_extra_connections(tmp_path):
+    path = str(tmp_path / 'small.db')
+    create_database(path, 1)
+    pool = backend.ConnectionPool(path, 1)
+    first, second = pool.acquire(), pool.acquire()
+
+    pool.release(first)
+    pool.release(second)
+
+    assert pool.acquire() is first
+    assert is_closed(second)
+
+
+def test_unknown_country_is_rejected():
+    with pytest.raises(ValueError, match='Unsupported country code'):
+        backend.get_db_pool('xx')
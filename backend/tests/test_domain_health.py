@@ -0,0 +1,130 @@
+import pytest
+
+import backend
+
+URL = 'https://breaker.example.com/article/1'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(backend.time, 'time', clock)
+    monkeypatch.setattr(backend, 'domain_health', {})
+    return clock
+
+
+def fail(times, error='HTTP 503'):
+    for _ in range(times):
+        backend.begin_fetch(URL, 10)
+        backend.end_fetch(URL, error=error)
+
+
+def test_opens_after_threshold(clock):
+    fail(backend.BREAKER_FAILURE_THRESHOLD - 1)
+    assert backend.get_domain_health(URL).state == 'closed'
+
+    fail(1)
+    health = backend.get_domain_health(URL)
+    assert health.state == 'open'
+    assert health.opened_at == clock.now
+    assert health.last_error == 'HTTP 503'
+
+
+def test_success_resets_the_failure_run(clock):
+    fail(backend.BREAKER_FAILURE_THRESHOLD - 1)
+    backend.begin_fetch(URL, 10)
+    backend.end_fetch(URL, 0.2)
+    fail(backend.BREAKER_FAILURE_THRESHOLD - 1)
+
+    assert backend.get_domain_health(URL).state == 'closed'
+
+
+def test_open_circuit_rejects_until_it_expires(clock):
+    fail(backend.BREAKER_FAILURE_THRESHOLD)
+
+    with pytest.raises(backend.CircuitOpenError):
+        backend.begin_fetch(URL, 10)
+    clock.now += backend.BREAKER_OPEN_SECONDS - 1
+    with pytest.raises(backend.CircuitOpenError):
+        backend.begin_fetch(URL, 10)
+
+    clock.now += 1
+    assert backend.begin_fetch(URL, 10) == 10
+    assert backend.get_domain_health(URL).state == 'half_open'
+
+
+def test_half_open_allows_a_single_probe(clock):
+    fail(backend.BREAKER_FAILURE_THRESHOLD)
+    clock.now += backend.BREAKER_OPEN_SECONDS
+
+    backend.begin_fetch(URL, 10)
+    with pytest.raises(backend.CircuitOpenError):
+        backend.begin_fetch(URL, 10)
+
+
+def test_probe_success_closes(clock):
+    fail(backend.BREAKER_FAILURE_THRESHOLD)
+    clock.now += backend.BREAKER_OPEN_SECONDS
+
+    backend.begin_fetch(URL, 10)
+    backend.end_fetch(URL, 0.5)
+
+    health = backend.get_domain_health(URL)
+    assert health.state == 'closed'
+    assert health.consecutive_failures == 0
+    assert backend.begin_fetch(URL, 10) == 10
+
+
+def test_probe_failure_reopens(clock):
+    fail(backend.BREAKER_FAILURE_THRESHOLD)
+    clock.now += backend.BREAKER_OPEN_SECONDS
+
+    backend.begin_fetch(URL, 10)
+    backend.end_fetch(URL, error='timed out')
+
+    health = backend.get_domain_health(URL)
+    assert health.state == 'open'
+    assert health.opened_at == clock.now
+    with pytest.raises(backend.CircuitOpenError):
+        backend.begin_fetch(URL, 10)
+
+
+def test_circuit_open_error_is_a_connection_error():
+    # Callers that already handle connection errors treat a skipped domain the same
+    assert issubclass(backend.CircuitOpenError, backend.requests.exceptions.ConnectionError)
+
+
+def record_latencies(latencies):
+    for seconds in latencies:
+        backend.begin_fetch(URL, 10)
+        backend.end_fetch(URL, seconds)
+
+
+def test_timeout_uses_the_ceiling_until_enough_samples(clock):
+    record_latencies([0.1] * (backend.FETCH_LATENCY_MIN_SAMPLES - 1))
+    assert backend.begin_fetch(URL, 10) == 10
+
+
+def test_timeout_tracks_p95_latency(clock):
+    record_latencies([0.5] * 19 + [2.0])
+    expected = 2.0 * backend.FETCH_TIMEOUT_MULTIPLIER
+    assert backend.begin_fetch(URL, 10) == pytest.approx(expected)
+
+
+def test_timeout_is_clamped(clock):
+    # Fast sites still get FETCH_TIMEOUT_MIN
+    record_latencies([0.01] * 20)
+    assert backend.begin_fetch(URL, 10) == backend.FETCH_TIMEOUT_MIN
+
+    # Slow sites never get more than the caller's timeout
+    backend.domain_health.clear()
+    record_latencies([8.0] * 20)
+    assert backend.begin_fetch(URL, 10) == 10
@@ -0,0 +1,115 @@
+import csv
+import io
+import json
+import sqlite3
+
+import pytest
+
+import backend
+from synthetic import create_database
+
+
+@pytest.fixture
+def country_db(tmp_path, monkeypatch):
+    path = str(tmp_path / 'swedish_news_URLs.db')
+    create_database(path, 30, sources=3)
+    conn = sqlite3.connect(path)
+    # Quotes, commas, newlines and non-ASCII must survive both formats
+    conn.execute(
+        "INSERT INTO articles (source, title, url, published, scraped_at, AI_tag) VALUES "
+        "('source1', 'Strajk w Łodzi: \"nie\", mówią\nzwiązkowcy', 'https://export.example.com/q', '2030-01-01T00:00:00', '2030-01-01T00:00:00', NULL)"
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setitem(backend.DATABASES, 'swe', path)
+    backend.migrate_database('swe')
+    return path
+
+
+def expected_rows(path, where=''):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in conn.execute(f"""
+            SELECT id, source, title, url, published, scraped_at, AI_tag as Category
+            FROM articles {where} ORDER BY published DESC, id DESC
+        """)]
+    finally:
+        conn.close()
+
+
+def test_ndjson_export(client, country_db):
+    response = client.get('/api/articles/swe/export', query_string={'format': 'ndjson', 'source': 'source1'})
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['Content-Disposition'].startswith('attachment; filename="articles-swe-')
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in lines] == expected_rows(country_db, "WHERE source = 'source1'")
+    assert list(json.loads(lines[0])) == list(backend.EXPORT_COLUMNS)
+
+
+def test_csv_export(client, country_db):
+    response = client.get('/api/articles/swe/export', query_string={'format': 'csv', 'limit': 5})
+
+    assert response.mimetype == 'text/csv'
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True), newline='')))
+    assert rows[0] == list(backend.EXPORT_COLUMNS)
+    expected = expected_rows(country_db)[:5]
+    assert rows[1:] == [['' if value is None else str(value) for value in row.values()] for row in expected]
+    assert 'mówią\nzwiązkowcy' in rows[1][2]
+
+
+def test_csv_export_of_nothing_has_a_header(client, country_db):
+    response = client.get('/api/articles/swe/export', query_string={'format': 'csv', 'source': 'nobody'})
+
+    assert response.get_data(as_text=True) == ','.join(backend.EXPORT_COLUMNS) + '\r\n'
+
+
+def test_export_is_streamed_in_batches(country_db, monkeypatch):
+    monkeypatch.setattr(backend, 'EXPORT_BATCH_SIZE', 7)
+    body = backend.stream_export('swe', 'ndjson', None)
+
+    assert next(body) is None
+    chunks = list(body)
+    assert [chunk.count('\n') for chunk in chunks] == [7, 7, 7, 7, 3]
+
+
+@pytest.mark.parametrize('query, error', [
+    ({'format': 'xml'}, 'format must be one of ndjson, csv'),
+    ({'limit': 'ten'}, 'limit and time must be integers'),
+    ({'time': 'day'}, 'limit and time must be integers'),
+])
+def test_bad_parameters_are_rejected(client, country_db, query, error):
+    response = client.get('/api/articles/swe/export', query_string=query)
+
+    assert response.status_code == 400
+    assert response.json == {'error': error}
+
+
+def test_errors_before_the_stream_starts_are_json(client, country_db):
+    # Raised while priming the generator, so the client gets a normal error
+    response = client.get('/api/articles/xx/export')
+
+    assert response.status_code == 400
+    assert response.json == {'error': 'Unsupported country code'}
+
+
+def test_leaving_early_returns_the_connection(country_db, monkeypatch):
+    monkeypatch.setattr(backend, 'EXPORT_BATCH_SIZE', 5)
+    pool = backend.get_db_pool('swe')
+    while not pool.connections.empty():
+        pool.connections.get_nowait().close()
+
+    body = backend.stream_export('swe', 'csv', None)
+    next(body)
+    next(body)
+    assert pool.connections.empty()
+
+    # What the server does when the client disconnects mid-download
+    body.close()
+
+    assert pool.connections.qsize() == 1
+    conn = pool.connections.get_nowait()
+    assert conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 31
+    pool.release(conn)
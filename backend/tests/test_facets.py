@@ -0,0 +1,68 @@
+import sqlite3
+
+import pytest
+
+import backend
+from synthetic import create_database
+
+
+@pytest.fixture
+def country_db(tmp_path, monkeypatch):
+    path = str(tmp_path / 'swedish_news_URLs.db')
+    create_database(path, 30, sources=3)
+    monkeypatch.setitem(backend.DATABASES, 'swe', path)
+    monkeypatch.setattr(backend, 'facet_cache', {})
+    monkeypatch.setattr(backend, 'metrics', backend.Metrics())
+    backend.migrate_database('swe')
+    # The first reader creates the -wal file, as the pool has long done in a
+    # running worker; it is part of the change token
+    with backend.db_connection('swe') as conn:
+        conn.execute("SELECT 1 FROM articles").fetchone()
+    return path
+
+
+def facet_lookups():
+    values = backend.metrics.counter_values('mundus_cache_requests_total')
+    return {
+        result: values.get((('cache', 'facet'), ('result', result)), 0)
+        for result in ('hit', 'miss')
+    }
+
+
+def test_sources_are_cached_until_the_database_changes(client, country_db):
+    first = client.get('/api/sources/swe')
+    assert sorted(first.json) == ['source0', 'source1', 'source2']
+    assert client.get('/api/sources/swe').json == first.json
+    assert facet_lookups() == {'hit': 1, 'miss': 1}
+
+    conn = sqlite3.connect(country_db)
+    conn.execute(
+        "INSERT INTO articles (source, title, url, published, scraped_at) VALUES ('source9', 'New', 'u', '2024-05-01', '2024-05-01')"
+    )
+    conn.commit()
+    conn.close()
+
+    changed = client.get('/api/sources/swe')
+    assert 'source9' in changed.json
+    assert changed.headers['ETag'] != first.headers['ETag']
+    assert facet_lookups() == {'hit': 1, 'miss': 2}
+
+
+def test_categories_skip_missing_tags(client, country_db):
+    categories = client.get('/api/categories/swe').json
+
+    assert categories == sorted(set(categories))
+    assert None not in categories
+
+
+def test_etag_revalidation(client, country_db):
+    first = client.get('/api/categories/swe')
+    assert first.headers['Cache-Control'] == f"public, max-age={backend.FACET_CACHE_MAX_AGE}"
+
+    revalidated = client.get('/api/categories/swe', headers={'If-None-Match': first.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.get_data() == b''
+
+    stale = client.get('/api/categories/swe', headers={'If-None-Match': '"something-else"'})
+    assert stale.status_code == 200
+    assert stale.json == first.json
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import backend
+
+
+class FakeFetch:
+    """Stands in for fetch_article_content, tracking how many calls overlap per host."""
+
+    def __init__(self, delay=0.2, delays=None, errors=()):
+        self.delay = delay
+        self.delays = delays or {}
+        self.errors = set(errors)
+        self.lock = threading.Lock()
+        self.calls = []
+        self.running = {}
+        self.peak = {}
+
+    def __call__(self, url, timeout):
+        host = backend.urlparse(url).netloc
+        with self.lock:
+            self.calls.append(url)
+            self.running[host] = self.running.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.running[host])
+        try:
+            time.sleep(self.delays.get(url, self.delay))
+            if url in self.errors:
+                raise ValueError(f"cannot fetch {url}")
+            return {'text': f"text of {url}"}
+        finally:
+            with self.lock:
+                self.running[host] -= 1
+
+
+def test_fetches_run_concurrently():
+    urls = [f"https://host{i}.example.com/article" for i in range(4)]
+    fetch = FakeFetch(delay=0.3)
+
+    start = time.monotonic()
+    contents, errors = backend.fetch_many(urls, fetch_function=fetch)
+
+    assert time.monotonic() - start < 0.9
+    assert contents == {url: {'text': f"text of {url}"} for url in urls}
+    assert errors == {}
+
+
+def test_per_host_limit():
+    urls = [f"https://busy.example.com/article/{i}" for i in range(6)]
+    fetch = FakeFetch(delay=0.1)
+
+    contents, _ = backend.fetch_many(urls, fetch_function=fetch)
+
+    assert len(contents) == 6
+    assert fetch.peak['busy.example.com'] == backend.FETCH_PER_HOST_LIMIT
+
+
+def test_duplicate_urls_are_fetched_once():
+    url = 'https://dup.example.com/article'
+    fetch = FakeFetch(delay=0)
+
+    results = list(backend.iter_fetches([url, url, url], fetch_function=fetch))
+
+    assert fetch.calls == [url]
+    assert [result[0] for result in results] == [url]
+
+
+def test_results_arrive_as_they_finish():
+    slow, fast = 'https://slow.example.com/a', 'https://fast.example.com/a'
+    fetch = FakeFetch(delays={slow: 0.4, fast: 0})
+
+    order = [url for url, _, _ in backend.iter_fetches([slow, fast], fetch_function=fetch)]
+
+    assert order == [fast, slow]
+
+
+def test_errors_are_reported_per_url():
+    good, bad = 'https://good.example.com/a', 'https://bad.example.com/a'
+    fetch = FakeFetch(delay=0, errors=[bad])
+
+    contents, errors = backend.fetch_many([good, bad], fetch_function=fetch)
+
+    assert list(contents) == [good]
+    assert errors == {bad: f"cannot fetch {bad}"}
+
+
+def test_deadline_stops_waiting_for_slow_pages():
+    slow, fast = 'https://late.example.com/a', 'https://early.example.com/a'
+    fetch = FakeFetch(delays={slow: 0.8, fast: 0})
+
+    start = time.monotonic()
+    contents, errors = backend.fetch_many([slow, fast], deadline=0.2, fetch_function=fetch)
+
+    assert time.monotonic() - start < 0.6
+    assert list(contents) == [fast]
+    assert errors == {slow: "Fetch deadline exceeded"}
+
+
+def test_merged_contents_keep_article_order():
+    articles = [
+        {'title': f"Article {i}", 'url': f"https://merge.example.com/{i}", 'source': 'stub', 'published': '2024-05-01'}
+        for i in range(3)
+    ]
+    fetched = {articles[2]['url']: {'text': 'two'}, articles[0]['url']: {'text': 'zero'}}
+    errors = {articles[1]['url']: 'timed out'}
+
+    contents, failed = backend.collect_merged_contents(articles, '', fetched, errors)
+
+    assert [item['content'] for item in contents] == ['zero', 'two']
+    assert failed == [{'url': articles[1]['url'], 'title': 'Article 1', 'error': 'timed out'}]
@@ -0,0 +1,133 @@
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import backend
+from synthetic import StubServer
+
+
+def CountingStub(delay=0, status=200):
+    """Answers every GET with `status` after `delay` seconds, counting requests."""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        requests = 0
+
+        def do_GET(self):
+            Handler.requests += 1
+            time.sleep(delay)
+            body = b'ok'
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    stub = StubServer(Handler)
+    stub.handler = Handler
+    return stub
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(backend, 'http_session_pid', None)
+    monkeypatch.setattr(backend, 'HTTP_RETRY_BACKOFF', 0)
+    return backend.get_http_session()
+
+
+def test_read_timeout_is_not_retried(session):
+    with CountingStub(delay=1) as stub:
+        start = time.monotonic()
+        with pytest.raises(backend.requests.exceptions.ReadTimeout):
+            session.get(f"{stub.url}/slow", timeout=0.3)
+        elapsed = time.monotonic() - start
+
+    assert stub.handler.requests == 1
+    assert elapsed < 0.9
+
+
+def test_server_errors_are_retried(session):
+    with CountingStub(status=503) as stub:
+        response = session.get(f"{stub.url}/down", timeout=5)
+
+    assert response.status_code == 503
+    assert stub.handler.requests == backend.HTTP_RETRIES + 1
+
+
+def ConditionalStub():
+    """Serves an article page with an ETag, answering 304 when the client already has it."""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        version = 1
+        seen = []
+
+        def do_GET(self):
+            etag = f'"v{Handler.version}"'
+            Handler.seen.append((self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since')))
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            body = (
+                f"<html><body><article><p>Version {Handler.version} of the article, "
+                "with enough words in it to count as a paragraph.</p></article></body></html>"
+            ).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', 'Wed, 01 May 2024 08:00:00 GMT')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    stub = StubServer(Handler)
+    stub.handler = Handler
+    return stub
+
+
+def expire(url):
+    conn = backend.get_cache_connection()
+    conn.execute(
+        "UPDATE fetched_content SET fetched_at = ? WHERE url = ?",
+        (time.time() - backend.CONTENT_STORE_TTL - 1, url)
+    )
+    conn.commit()
+
+
+def test_stale_page_is_revalidated_with_a_conditional_get(session):
+    with ConditionalStub() as stub:
+        url = f"{stub.url}/article/conditional"
+        first = backend.fetch_article_content(url)
+        assert 'Version 1' in first['text']
+        assert stub.handler.seen == [(None, None)]
+
+        # Fresh: served from the store without a request
+        backend.fetch_article_content(url)
+        assert len(stub.handler.seen) == 1
+
+        expire(url)
+        second = backend.fetch_article_content(url)
+        assert stub.handler.seen[-1] == ('"v1"', 'Wed, 01 May 2024 08:00:00 GMT')
+        assert second == {field: first[field] for field in backend.CONTENT_FIELDS}
+        # The 304 made the stored copy fresh again
+        assert backend.is_fresh(backend.get_stored_page(url))
+
+
+def test_changed_page_replaces_the_stored_copy(session):
+    with ConditionalStub() as stub:
+        url = f"{stub.url}/article/changed"
+        backend.fetch_article_content(url)
+
+        stub.handler.version = 2
+        expire(url)
+        content = backend.fetch_article_content(url)
+
+        assert stub.handler.seen[-1][0] == '"v1"'
+        assert 'Version 2' in content['text']
+        assert backend.get_stored_page(url)['etag'] == '"v2"'
@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+
+import backend
+from synthetic import create_database
+
+TITLES = [
+    'Strajk w Łodzi trwa',
+    'Ny bro over Øresund',
+    'Kæmpe udbud i Ærøskøbing',
+    'Đoković vinder igen',
+    'Großer Streik an der Straße',
+    'Nytt stadion i Malmö',
+]
+
+
+@pytest.fixture
+def country_db(tmp_path, monkeypatch):
+    path = str(tmp_path / 'swedish_news_URLs.db')
+    create_database(path, 20)
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO articles (source, title, url, published, scraped_at) VALUES ('folded', ?, ?, '2024-05-01', '2024-05-01')",
+        [(title, f"https://search.example.com/{i}") for i, title in enumerate(TITLES)]
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setitem(backend.DATABASES, 'swe', path)
+    monkeypatch.setattr(backend, 'count_cache', backend.OrderedDict())
+    backend.migrate_database('swe')
+    return path
+
+
+def search(client, query):
+    response = client.get('/api/articles/swe', query_string={'search': query, 'source': 'folded', 'per_page': 50})
+    assert response.status_code == 200, response.json
+    return sorted(article['title'] for article in response.json['articles'])
+
+
+@pytest.mark.parametrize('query, title', [
+    # Letters with no Unicode decomposition, folded by SEARCH_FOLDED_LETTERS
+    ('lodzi', 'Strajk w Łodzi trwa'),
+    ('oresund', 'Ny bro over Øresund'),
+    ('kaempe aeroskobing', 'Kæmpe udbud i Ærøskøbing'),
+    ('dokovic', 'Đoković vinder igen'),
+    ('strasse', 'Großer Streik an der Straße'),
+    # Accents folded by the tokenizer, and either spelling finds the row
+    ('malmo', 'Nytt stadion i Malmö'),
+    ('Malmö', 'Nytt stadion i Malmö'),
+    ('Łodzi', 'Strajk w Łodzi trwa'),
+    # Prefix match on partial input
+    ('ærøsk', 'Kæmpe udbud i Ærøskøbing'),
+])
+def test_search_folds_letters(client, country_db, query, title):
+    assert search(client, query) == [title]
+
+
+def test_search_plan_uses_fts(country_db):
+    conn = backend.get_db_connection('swe')
+    try:
+        plan = backend.explain_article_query(conn, search_query='lodzi')
+    finally:
+        conn.close()
+    assert any('articles_fts' in step for step in plan)
+
+
+def test_triggers_keep_the_index_in_sync(client, country_db):
+    conn = sqlite3.connect(country_db)
+    conn.execute(
+        "INSERT INTO articles (source, title, url, published, scraped_at) VALUES ('folded', 'Nowy most w Białymstoku', 'u', '2024-05-02', '2024-05-02')"
+    )
+    conn.execute("UPDATE articles SET title = 'Ny bro over Limfjorden' WHERE title = 'Ny bro over Øresund'")
+    conn.execute("DELETE FROM articles WHERE title = 'Đoković vinder igen'")
+    conn.commit()
+    conn.close()
+
+    assert search(client, 'bialymstoku') == ['Nowy most w Białymstoku']
+    assert search(client, 'oresund') == []
+    assert search(client, 'limfjorden') == ['Ny bro over Limfjorden']
+    assert search(client, 'dokovic') == []
+
+
+def test_search_input_cannot_inject_fts_syntax(client, country_db):
+    # Operators and quotes are matched as words, not parsed
+    assert search(client, 'lodzi OR "malmo') == []
+    assert search(client, 'title:lodzi') == []
@@ -0,0 +1,144 @@
+import json
+
+import pytest
+
+import backend
+from synthetic import OpenAIStub, PublisherStub
+
+# Nothing listens here, so fetches fail straight away
+UNREACHABLE_URL = 'http://127.0.0.1:1/article/missing'
+
+
+@pytest.fixture(scope='module')
+def publisher():
+    with PublisherStub(latency=0) as stub:
+        yield stub
+
+
+@pytest.fixture(scope='module', autouse=True)
+def openai_stub():
+    with OpenAIStub(latency=0, tokens=5, token_delay=0) as stub:
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setenv('OPENAI_BASE_URL', f"{stub.url}/v1")
+            # Drop the cached client so the next call picks up the stub
+            mp.setattr(backend, 'openai_client_pid', None)
+            yield stub
+
+
+def read_events(response):
+    """Parse a Server-Sent Events body into a list of (event, data) pairs."""
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    events = []
+    for block in response.get_data(as_text=True).split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+        if fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def names(events):
+    return [event for event, _ in events]
+
+
+def test_article_stream(client, publisher):
+    article = {'title': 'Stream', 'url': f"{publisher.url}/article/stream", 'source': 'stub', 'published': '2024-05-01T08:00:00'}
+    events = read_events(client.post('/api/summarize/stream', json={'article': article, 'no_cache': True}))
+
+    stages = [data['stage'] for event, data in events if event == 'progress']
+    assert stages[:2] == ['fetching', 'fetched']
+    assert stages[-1] == 'generating'
+    assert names(events)[-1] == 'done'
+    tokens = [data['content'] for event, data in events if event == 'token']
+    assert tokens
+    # Every progress event comes before the first token
+    assert names(events).index('token') > max(i for i, name in enumerate(names(events)) if name == 'progress')
+
+    done = events[-1][1]
+    assert done['summary'] == ''.join(tokens)
+    assert done['summary'].startswith('HEADLINE:')
+    assert done['cached'] is False
+    assert done['article'] == article
+
+
+def test_article_stream_selected_text_skips_fetch(client):
+    article = {'title': 'Selected', 'url': UNREACHABLE_URL, 'source': 'stub', 'published': '2024-05-01T08:00:00'}
+    events = read_events(client.post('/api/summarize/stream', json={
+        'article': article, 'selected_text': 'Only this paragraph.', 'no_cache': True
+    }))
+
+    assert [data['stage'] for event, data in events if event == 'progress'] == ['generating']
+    assert names(events)[-1] == 'done'
+
+
+def test_article_stream_fetch_error(client):
+    article = {'title': 'Missing', 'url': UNREACHABLE_URL, 'source': 'stub', 'published': '2024-05-01T08:00:00'}
+    events = read_events(client.post('/api/summarize/stream', json={'article': article, 'no_cache': True}))
+
+    assert names(events) == ['progress', 'error']
+    assert events[0][1]['stage'] == 'fetching'
+    assert events[-1][1]['error']
+
+
+class FailingOpenAI:
+    class chat:
+        class completions:
+            @staticmethod
+            def create(**kwargs):
+                raise RuntimeError("OpenAI is unavailable")
+
+
+def test_article_stream_openai_error_is_recorded(client, monkeypatch):
+    monkeypatch.setattr(backend, 'metrics', backend.Metrics())
+    monkeypatch.setattr(backend, 'get_openai_client', lambda: FailingOpenAI)
+    article = {'title': 'Down', 'url': UNREACHABLE_URL, 'source': 'stub', 'published': '2024-05-01T08:00:00'}
+    events = read_events(client.post('/api/summarize/stream', json={
+        'article': article, 'selected_text': 'Only this paragraph.', 'no_cache': True
+    }))
+
+    assert names(events) == ['progress', 'error']
+    assert events[-1][1]['error'] == 'OpenAI is unavailable'
+    requests = backend.metrics.counter_values('mundus_openai_requests_total')
+    assert requests == {(('endpoint', 'summarize_article_stream'), ('result', 'error')): 1}
+
+
+def test_article_stream_requires_url(client):
+    response = client.post('/api/summarize/stream', json={'article': {'title': 'No URL'}})
+    assert response.status_code == 400
+
+
+def test_merged_stream(client, publisher):
+    articles = [
+        {'title': f"Merged {i}", 'url': f"{publisher.url}/article/merged{i}", 'source': 'stub', 'published': '2024-05-01T08:00:00'}
+        for i in range(3)
+    ]
+    articles.append({'title': 'Missing', 'url': UNREACHABLE_URL, 'source': 'stub', 'published': '2024-05-01T08:00:00'})
+    events = read_events(client.post('/api/summarize-merged/stream', json={'articles': articles, 'no_cache': True}))
+
+    progress = [data for event, data in events if event == 'progress']
+    assert progress[0] == {'stage': 'fetching', 'total': 4}
+    assert sorted(data['url'] for data in progress if data['stage'] == 'fetched') == \
+        sorted(article['url'] for article in articles[:3])
+    assert [data['url'] for data in progress if data['stage'] == 'failed'] == [UNREACHABLE_URL]
+    assert progress[-1] == {'stage': 'generating'}
+    assert names(events)[-1] == 'done'
+
+    done = events[-1][1]
+    assert done['summary'] == ''.join(data['content'] for event, data in events if event == 'token')
+    assert done['articles'] == articles
+    assert [article['url'] for article in done['failed_articles']] == [UNREACHABLE_URL]
+
+
+def test_merged_stream_all_fetches_failed(client):
+    articles = [{'title': 'Missing', 'url': UNREACHABLE_URL, 'source': 'stub', 'published': '2024-05-01T08:00:00'}]
+    events = read_events(client.post('/api/summarize-merged/stream', json={'articles': articles, 'no_cache': True}))
+
+    assert names(events) == ['progress', 'progress', 'error']
+    assert events[1][1]['stage'] == 'failed'
+    assert 'token' not in names(events)
+    assert events[-1][1]['failed_articles']
+
+
+def test_merged_stream_requires_articles(client):
+    response = client.post('/api/summarize-merged/stream', json={'articles': []})
+    assert response.status_code == 400
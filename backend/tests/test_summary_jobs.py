@@ -0,0 +1,259 @@
+import threading
+import time
+
+import pytest
+
+import backend
+
+ARTICLES = [
+    {'title': f"Job {i}", 'url': f"https://jobs.example.com/article/{i}", 'source': 'stub',
+     'published': '2024-05-01T08:00:00'}
+    for i in range(3)
+]
+PAGE = {
+    'text': 'A short article body.\n',
+    'description': None,
+    'first_paragraph': 'A short article body.',
+    'image': None,
+    'favicon': None,
+    'published_date': None,
+    'http_status': 200
+}
+
+
+@pytest.fixture(autouse=True)
+def jobs_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(backend, 'JOBS_DB_PATH', str(tmp_path / 'jobs.db'))
+    monkeypatch.setattr(backend, 'jobs_local', threading.local())
+
+
+@pytest.fixture
+def worker():
+    return backend.SummaryWorker(concurrency=1)
+
+
+def item_row(job_id, position=0):
+    return backend.get_jobs_connection().execute(
+        "SELECT * FROM summary_job_items WHERE job_id = ? AND position = ?", (job_id, position)
+    ).fetchone()
+
+
+def test_concurrent_claims_get_distinct_items():
+    backend.create_summary_job('swe', ARTICLES, 'Summarise', False)
+    claimed = []
+    barrier = threading.Barrier(8)
+
+    def claim():
+        barrier.wait()
+        item = backend.claim_job_item()
+        if item is not None:
+            claimed.append(item['id'])
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(claimed) == len(ARTICLES)
+    assert len(set(claimed)) == len(ARTICLES)
+    assert backend.claim_job_item() is None
+
+
+def test_expired_lease_is_claimed_again():
+    job_id = backend.create_summary_job('swe', ARTICLES[:1], 'Summarise', False)
+    first = backend.claim_job_item()
+    assert backend.claim_job_item() is None
+
+    conn = backend.get_jobs_connection()
+    with conn:
+        conn.execute(
+            "UPDATE summary_job_items SET updated_at = ? WHERE id = ?",
+            (time.time() - backend.SUMMARY_JOB_LEASE - 1, first['id'])
+        )
+    second = backend.claim_job_item()
+
+    assert second['id'] == first['id']
+    assert item_row(job_id)['attempts'] == 2
+
+
+def test_transient_error_requeues_with_backoff(worker, monkeypatch):
+    def fetch(url, timeout):
+        raise backend.requests.exceptions.ConnectionError("connection reset")
+    monkeypatch.setattr(backend, 'fetch_article_content', fetch)
+    job_id = backend.create_summary_job('swe', ARTICLES[:1], 'Summarise', False)
+
+    worker.process(backend.claim_job_item())
+
+    row = item_row(job_id)
+    assert row['status'] == 'queued'
+    assert row['error'] == 'connection reset'
+    assert row['available_at'] > time.time() + backend.SUMMARY_JOB_RETRY_DELAY * 0.4
+    assert backend.claim_job_item() is None
+
+
+def test_transient_error_fails_after_max_attempts(worker, monkeypatch):
+    def fetch(url, timeout):
+        raise backend.requests.exceptions.Timeout("timed out")
+    monkeypatch.setattr(backend, 'fetch_article_content', fetch)
+    monkeypatch.setattr(backend, 'SUMMARY_JOB_RETRY_DELAY', 0)
+    job_id = backend.create_summary_job('swe', ARTICLES[:1], 'Summarise', False)
+
+    for _ in range(backend.SUMMARY_JOB_MAX_ATTEMPTS):
+        worker.process(backend.claim_job_item())
+
+    row = item_row(job_id)
+    assert row['status'] == 'failed'
+    assert row['attempts'] == backend.SUMMARY_JOB_MAX_ATTEMPTS
+    assert backend.load_summary_job(job_id)['status'] == 'finished'
+
+
+def test_permanent_error_fails_at_once(worker, monkeypatch):
+    def fetch(url, timeout):
+        raise ValueError("unsupported page")
+    monkeypatch.setattr(backend, 'fetch_article_content', fetch)
+    job_id = backend.create_summary_job('swe', ARTICLES[:1], 'Summarise', False)
+
+    worker.process(backend.claim_job_item())
+
+    row = item_row(job_id)
+    assert row['status'] == 'failed'
+    assert row['attempts'] == 1
+    assert row['error'] == 'unsupported page'
+
+
+def test_publisher_server_error_is_retried(worker, monkeypatch):
+    monkeypatch.setattr(backend, 'fetch_article_content', lambda url, timeout: {**PAGE, 'http_status': 503})
+    def complete(*args, **kwargs):
+        raise AssertionError("an error page must not be summarised")
+    monkeypatch.setattr(backend, 'complete_summary', complete)
+    job_id = backend.create_summary_job('swe', ARTICLES[:1], 'Summarise', False)
+
+    worker.process(backend.claim_job_item())
+
+    row = item_row(job_id)
+    assert row['status'] == 'queued'
+    assert row['error'] == 'Publisher returned HTTP 503'
+
+
+def test_finished_item_records_summary(worker, monkeypatch):
+    monkeypatch.setattr(backend, 'fetch_article_content', lambda url, timeout: PAGE)
+    monkeypatch.setattr(backend, 'complete_summary', lambda *args, **kwargs: ('HEADLINE: done', False))
+    job_id = backend.create_summary_job('swe', ARTICLES[:1], 'Summarise', True)
+
+    worker.process(backend.claim_job_item())
+
+    job = backend.load_summary_job(job_id)
+    assert job['status'] == 'finished'
+    assert job['items'][0]['summary'] == 'HEADLINE: done'
+    assert job['items'][0]['cached'] is False
+
+
+def test_shutdown_requeue_keeps_attempts(worker, monkeypatch):
+    monkeypatch.setattr(backend, 'fetch_article_content', lambda url, timeout: PAGE)
+    monkeypatch.setattr(worker.token_bucket, 'take', lambda tokens, stop_event: False)
+    job_id = backend.create_summary_job('swe', ARTICLES[:1], 'Summarise', True)
+
+    for _ in range(backend.SUMMARY_JOB_MAX_ATTEMPTS + 1):
+        worker.process(backend.claim_job_item())
+
+    row = item_row(job_id)
+    assert row['status'] == 'queued'
+    assert row['attempts'] == 0
+
+
+def test_cached_summary_skips_the_token_bucket(worker, monkeypatch):
+    monkeypatch.setattr(backend, 'fetch_article_content', lambda url, timeout: PAGE)
+    def take(tokens, stop_event):
+        raise AssertionError("a cached summary must not draw on the budget")
+    monkeypatch.setattr(worker.token_bucket, 'take', take)
+    instructions = 'Summarise the cached one'
+    prompt = backend.build_article_prompt(ARTICLES[0], instructions, PAGE['text'])
+    backend.store_summary(
+        backend.summary_cache_key(backend.ARTICLE_SYSTEM_PROMPT, prompt, instructions, 500), 'HEADLINE: cached'
+    )
+    job_id = backend.create_summary_job('swe', ARTICLES[:1], instructions, False)
+
+    worker.process(backend.claim_job_item())
+
+    item = backend.load_summary_job(job_id)['items'][0]
+    assert item['status'] == 'done'
+    assert item['summary'] == 'HEADLINE: cached'
+    assert item['cached'] is True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_at_the_per_minute_rate(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(backend.time, 'time', clock)
+    bucket = backend.TokenBucket('test', 600)
+    stopped = threading.Event()
+    stopped.set()
+
+    assert bucket.take(600, stopped)
+    # Empty: with the stop event set, take() gives up instead of waiting
+    assert not bucket.take(100, stopped)
+
+    clock.now += 10
+    assert bucket.take(100, stopped)
+    assert not bucket.take(1, stopped)
+
+
+def test_token_bucket_is_shared_by_name(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(backend.time, 'time', clock)
+    stopped = threading.Event()
+    stopped.set()
+
+    # Stands in for a bucket in another worker process
+    assert backend.TokenBucket('shared', 600).take(500, stopped)
+    other = backend.TokenBucket('shared', 600)
+    assert not other.take(200, stopped)
+    assert other.take(100, stopped)
+
+
+def test_token_bucket_give_back(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(backend.time, 'time', clock)
+    bucket = backend.TokenBucket('refund', 600)
+    stopped = threading.Event()
+    stopped.set()
+
+    assert bucket.take(600, stopped)
+    bucket.give_back(400)
+    assert bucket.take(400, stopped)
+    assert not bucket.take(1, stopped)
+
+
+def read_event_names(response):
+    return [line.split(': ', 1)[1] for line in response.get_data(as_text=True).splitlines()
+            if line.startswith('event: ')]
+
+
+def test_event_stream_ends_with_reconnect_after_the_cap(client, monkeypatch):
+    monkeypatch.setattr(backend, 'SUMMARY_JOB_STREAM_MAX_SECONDS', 0.2)
+    monkeypatch.setattr(backend, 'SUMMARY_JOB_POLL_INTERVAL', 0.05)
+    job_id = backend.create_summary_job('swe', ARTICLES[:1], 'Summarise', False)
+
+    response = client.get(f"/api/summary-jobs/{job_id}/events")
+
+    assert read_event_names(response) == ['item', 'progress', 'reconnect']
+    assert f"/api/summary-jobs/{job_id}" in response.get_data(as_text=True)
+
+
+def test_event_stream_ends_with_done(client, worker, monkeypatch):
+    monkeypatch.setattr(backend, 'fetch_article_content', lambda url, timeout: PAGE)
+    monkeypatch.setattr(backend, 'complete_summary', lambda *args, **kwargs: ('HEADLINE: done', False))
+    job_id = backend.create_summary_job('swe', ARTICLES[:1], 'Summarise', True)
+    worker.process(backend.claim_job_item())
+
+    response = client.get(f"/api/summary-jobs/{job_id}/events")
+
+    assert read_event_names(response) == ['item', 'progress', 'done']
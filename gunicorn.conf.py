@@ -0,0 +1,22 @@
+# Gunicorn settings for the backend, picked up automatically when gunicorn is
+# started from the repository root.
+#
+# The default sync worker handles one request at a time, so a summarize request
+# waiting on a publisher and then on OpenAI holds a whole worker for 20+
+# seconds. Threaded workers (gthread) give each worker a pool of threads:
+# outbound HTTP and OpenAI calls release the GIL while they wait, so the cheap
+# SQLite endpoints keep being served by the other threads in the meantime.
+import os
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+# Only the sync worker is affected by this: gunicorn switches it to gthread when
+# threads > 1, so set GUNICORN_THREADS=1 to really run sync workers
+threads = int(os.getenv('GUNICORN_THREADS', 16))
+
+# Merged summaries can legitimately take longer than gunicorn's 30s default
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8000)}"
@@ -1,4 +1,4 @@
-import { Article, CountryCode, FilterState, Writeup } from '../types';
+import { Article, CountryCode, FilterState, SummaryJob, Writeup } from '../types';
 
 const API_BASE_URL = 'http://localhost:5000/api';
 
@@ -43,6 +43,15 @@ export const fetchArticlePreview = async (country: CountryCode, articleId: numbe
     return response.json();
 };
 
+export const fetchArticlePreviews = async (country: CountryCode, articleIds: number[]): Promise<{ articles: Article[], missing: number[], incomplete: number[] }> => {
+    const params = new URLSearchParams({ ids: articleIds.join(',') });
+    const response = await fetch(`${API_BASE_URL}/article-previews/${country}?${params}`);
+    if (!response.ok) {
+        throw new Error('Failed to fetch article previews');
+    }
+    return response.json();
+};
+
 export const summarizeArticle = async (article: Article, instructions: string, selectedText?: string): Promise<{ summary: string, article: Article }> => {
     try {
         console.log('Sending request to summarize article:', {
@@ -144,4 +153,109 @@ export const summarizeMergedArticles = async (articles: Article[], instructions:
         console.error('Error in summarizeMergedArticles:', error);
         throw error;
     }
-}; 
\ No newline at end of file
+};
+
+export interface SummaryStreamHandlers {
+    onProgress?: (progress: { stage: string; url?: string; total?: number; error?: string }) => void;
+    onToken?: (content: string) => void;
+}
+
+// Reads the Server-Sent Events of /summarize/stream and /summarize-merged/stream
+// and resolves with the final `done` payload.
+const readSummaryStream = async (path: string, body: object, handlers: SummaryStreamHandlers) => {
+    const response = await fetch(`${API_BASE_URL}${path}`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(body)
+    });
+    if (!response.ok || !response.body) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(`Failed to generate summary: ${errorData.error || response.statusText}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) {
+            break;
+        }
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop() || '';
+        for (const rawEvent of events) {
+            const event = rawEvent.match(/^event: (.*)$/m)?.[1];
+            const data = JSON.parse(rawEvent.match(/^data: (.*)$/m)?.[1] || '{}');
+            if (event === 'progress') {
+                handlers.onProgress?.(data);
+            } else if (event === 'token') {
+                handlers.onToken?.(data.content);
+            } else if (event === 'done') {
+                return data;
+            } else if (event === 'error') {
+                throw new Error(`Failed to generate summary: ${data.error}`);
+            }
+        }
+    }
+    throw new Error('Summary stream ended unexpectedly');
+};
+
+export const summarizeArticleStream = async (article: Article, instructions: string, handlers: SummaryStreamHandlers, selectedText?: string): Promise<{ summary: string, article: Article }> => {
+    return readSummaryStream('/summarize/stream', {
+        article: {
+            id: article.id,
+            title: article.title,
+            source: article.source,
+            url: article.url,
+            published: article.published,
+            Category: article.Category
+        },
+        instructions: instructions || 'Please provide a concise summary of the following news article, highlighting the key points and maintaining an objective tone.',
+        selected_text: selectedText || ''
+    }, handlers);
+};
+
+export const summarizeMergedArticlesStream = async (articles: Article[], instructions: string, handlers: SummaryStreamHandlers, selectedText?: string): Promise<{ summary: string, articles: Article[] }> => {
+    return readSummaryStream('/summarize-merged/stream', {
+        articles: articles.map(article => ({
+            id: article.id,
+            title: article.title,
+            source: article.source,
+            url: article.url,
+            published: article.published,
+            Category: article.Category
+        })),
+        instructions: instructions || 'Please provide a comprehensive summary of the following news articles, highlighting the key points and maintaining an objective tone.',
+        selected_text: selectedText || ''
+    }, handlers);
+};
+
+export const createSummaryJob = async (country: CountryCode, articleIds: number[], instructions?: string): Promise<{ job_id: string, total: number, missing: number[], status_url: string, events_url: string }> => {
+    const response = await fetch(`${API_BASE_URL}/summary-jobs`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            country,
+            article_ids: articleIds,
+            instructions: instructions || 'Please provide a concise summary of the following news article, highlighting the key points and maintaining an objective tone.'
+        })
+    });
+    if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(`Failed to create summary job: ${errorData.error || response.statusText}`);
+    }
+    return response.json();
+};
+
+export const fetchSummaryJob = async (jobId: string): Promise<SummaryJob> => {
+    const response = await fetch(`${API_BASE_URL}/summary-jobs/${jobId}`);
+    if (!response.ok) {
+        throw new Error('Failed to fetch summary job');
+    }
+    return response.json();
+};
@@ -12,6 +12,7 @@ export interface Article {
         description: string;
         favicon: string | null;
         image: string | null;
+        published_date?: string | null;
     };
 }
 
@@ -37,9 +38,32 @@ export interface ArticleResponse {
     page: number;
     per_page: number;
     total_pages: number;
+    next_cursor?: string | null;
 }
 
 export interface EditorState {
     activeTab: 'writeups' | 'instructions';
     instructions: string;
-} 
\ No newline at end of file
+} 
+
+export interface SummaryJobItem {
+    position: number;
+    article: Article;
+    status: 'queued' | 'running' | 'done' | 'failed';
+    attempts: number;
+    summary: string | null;
+    cached: boolean | null;
+    error: string | null;
+}
+
+export interface SummaryJob {
+    id: string;
+    country: string;
+    instructions: string;
+    status: 'queued' | 'running' | 'finished';
+    total: number;
+    counts: Record<SummaryJobItem['status'], number>;
+    created_at: string;
+    finished_at: string | null;
+    items: SummaryJobItem[];
+}